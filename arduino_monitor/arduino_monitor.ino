@@ -4,6 +4,7 @@
 LiquidCrystal lcd(12, 11, 5, 4, 3, 2);
 
 // --- Настройки кнопок ---
+// Что делают кнопки, решает ПК (см. handle_button в Python-скрипте); скетч только сообщает о нажатии
 const int BUTTON_A_PIN = 6; // Пин для кнопки A (Принудительное обновление погоды / Возврат из статистики)
 const int BUTTON_B_PIN = 7; // Пин для кнопки B (Показать системные данные + сеть)
 
@@ -17,49 +18,270 @@ int buttonBState = 0;
 int lastButtonBState = 0;       
 unsigned long lastButtonBPressTime = 0; 
 
-// --- Переменные для режима отображения ---
-// 0: Режим ожидания (Дата/Время + Погода)
-// 1: Режим прокрутки системной статистики (CPU/RAM/ROM -> Network Info)
-int displayMode = 0; // Начинаем в режиме ожидания
-
-// --- Подрежим для прокрутки статистики ---
-// 0: Показываем CPU/RAM/ROM
-// 1: Показываем Network Info
-int statsSubMode = 0;
-
 // --- Переменные для таймаута соединения ---
 unsigned long last_data_received_time = 0;
 const long CONNECTION_TIMEOUT = 4000; // 4 секунды
 boolean connection_active = false;
 
-// --- Буфер для хранения последних полученных данных ---
-String current_weather_line1 = ""; // Дата/Время
-String current_weather_line2 = ""; // Погода
-String current_system_line1 = "";  // CPU/RAM
-String current_system_line2 = "";  // ROM
-String current_network_line1 = ""; // SSID
-String current_network_line2 = ""; // IP
+// --- Строки, которые сейчас на экране (какой экран показывать, решает ПК) ---
+String current_screen_line1 = "";
+String current_screen_line2 = "";
+
+// --- Кадровый протокол обмена с ПК (см. monitor_core/protocol.py) ---
+// Формат кадра: 0xA5 | версия | тип | длина | данные[длина] | CRC8 (от версии до данных)
+const byte FRAME_SOF = 0xA5;
+const byte PROTOCOL_VERSION = 1;
+const byte MAX_FRAME_PAYLOAD = 64;
+const byte LCD_COLS = 16;
+
+// Типы сообщений: ПК -> Arduino
+const byte MSG_IDLE_LINE = 0x01;    // [строка][текст]
+const byte MSG_KEEPALIVE = 0x04;    // без данных
+const byte MSG_BAUD_PROPOSE = 0x05; // [скорость u32 LE]
+const byte MSG_BAUD_TEST = 0x06;    // [тестовые байты], возвращаем обратно
+const byte MSG_BAUD_CONFIRM = 0x07; // без данных
+const byte MSG_MARQUEE = 0x08;      // [строка][шаг мс u16 LE][текст]
+const byte MSG_GLYPH = 0x09;        // [ячейка 0-7][8 байт битмапа]
+const byte MSG_HELLO_REQUEST = 0x0A; // без данных, отвечаем MSG_HELLO
+// Типы сообщений: Arduino -> ПК
+const byte MSG_ACK = 0x11;          // [строка][CRC8 подтверждаемого кадра]
+const byte MSG_BAUD_ACCEPT = 0x12;  // [скорость u32 LE], 0 - не поддерживается
+const byte MSG_BUTTON = 0x13;       // [кнопка]
+const byte MSG_HELLO = 0x14;        // [HELLO_BANNER]
+
+// Приветствие: по нему ПК находит Arduino среди последовательных портов (см. HELLO_BANNER в monitor_core/protocol.py)
+const char HELLO_BANNER[] = "arduino-monitor";
+
+// Коды кнопок
+const byte BUTTON_A = 1;
+const byte BUTTON_B = 2;
+
+// --- Согласование скорости порта ---
+// Стартуем на базовой скорости, ПК предлагает более быструю. Если ПК не подтвердил
+// её за BAUD_CONFIRM_TIMEOUT_MS, возвращаемся на базовую.
+// Скорости выше 115200 не берём: 64-байтный приёмный буфер не успевает за loop() с выводом на LCD.
+const unsigned long BASE_BAUD_RATE = 9600;
+const unsigned long SUPPORTED_BAUD_RATES[] = {115200, 57600, 38400, 19200};
+const byte SUPPORTED_BAUD_RATES_COUNT = sizeof(SUPPORTED_BAUD_RATES) / sizeof(SUPPORTED_BAUD_RATES[0]);
+const long BAUD_CONFIRM_TIMEOUT_MS = 1500;
+unsigned long current_baud_rate = BASE_BAUD_RATE;
+boolean baud_pending_confirm = false;
+unsigned long baud_switch_time = 0;
+
+// --- Бегущая строка: ПК присылает текст один раз, сдвигаем его сами ---
+boolean marquee_active = false;
+byte marquee_row = 1;
+String marquee_text = "";
+unsigned int marquee_step_ms = 200;
+unsigned int marquee_offset = 0;
+unsigned long marquee_last_step_time = 0;
+
+// Состояние разбора входящего кадра (байты обрабатываются по одному, без блокировок)
+// 0: ждём SOF, 1: версия, 2: тип, 3: длина, 4: данные, 5: CRC
+byte rx_state = 0;
+byte rx_type = 0;
+byte rx_length = 0;
+byte rx_index = 0;
+byte rx_crc = 0;
+byte rx_payload[MAX_FRAME_PAYLOAD];
+
+byte crc8Update(byte crc, byte data) {
+  crc ^= data;
+  for (byte i = 0; i < 8; i++) {
+    crc = (crc & 0x80) ? (crc << 1) ^ 0x07 : (crc << 1);
+  }
+  return crc;
+}
+
+void sendFrame(byte type, const byte* payload, byte length) {
+  byte crc = crc8Update(crc8Update(crc8Update(0, PROTOCOL_VERSION), type), length);
+  Serial.write(FRAME_SOF);
+  Serial.write(PROTOCOL_VERSION);
+  Serial.write(type);
+  Serial.write(length);
+  for (byte i = 0; i < length; i++) {
+    Serial.write(payload[i]);
+    crc = crc8Update(crc, payload[i]);
+  }
+  Serial.write(crc);
+}
+
+void sendHello() {
+  sendFrame(MSG_HELLO, (const byte*)HELLO_BANNER, sizeof(HELLO_BANNER) - 1);
+}
+
+void sendButton(byte button) {
+  sendFrame(MSG_BUTTON, &button, 1);
+}
 
-// --- Таймеры для Arduino ---
-unsigned long last_weather_request_time = 0;
-const long WEATHER_UPDATE_INTERVAL_ARDUINO_MS = 15 * 60 * 1000; // 15 минут в миллисекундах
+boolean isSupportedBaudRate(unsigned long rate) {
+  for (byte i = 0; i < SUPPORTED_BAUD_RATES_COUNT; i++) {
+    if (SUPPORTED_BAUD_RATES[i] == rate) return true;
+  }
+  return false;
+}
 
-unsigned long stats_display_start_time = 0;
-const long SINGLE_CARD_DISPLAY_DURATION_MS = 5 * 1000; // 5 секунд для показа каждой карточки статистики
+void switchBaudRate(unsigned long rate) {
+  Serial.flush(); // Дожидаемся отправки ответа на старой скорости
+  Serial.end();
+  Serial.begin(rate);
+  current_baud_rate = rate;
+  rx_state = 0; // Недособранный кадр на старой скорости уже не сойдётся
+}
+
+String payloadToString(const byte* payload, byte start, byte end) {
+  String text = "";
+  for (byte i = start; i < end; i++) {
+    text += (char)payload[i];
+  }
+  return text;
+}
+
+void setScreenLine(byte row, String text) {
+  if (row == 0) {
+      current_screen_line1 = text;
+  } else {
+      current_screen_line2 = text;
+  }
+  lcd.setCursor(0, row); lcd.print(text); // Перерисовываем только эту строку, без lcd.clear()
+}
+
+void redrawScreen() {
+  lcd.clear();
+  if (current_screen_line1.length() > 0) {
+      lcd.setCursor(0, 0); lcd.print(current_screen_line1);
+      lcd.setCursor(0, 1); lcd.print(current_screen_line2);
+  } else {
+      lcd.setCursor(0, 0); lcd.print("Waiting for data");
+  }
+}
+
+// Видимые 16 символов бегущей строки. Окно хранится в current_screen_line*,
+// поэтому redrawScreen() показывает его без изменений.
+void showMarqueeWindow() {
+  String window = marquee_text.substring(marquee_offset) + marquee_text.substring(0, marquee_offset);
+  while (window.length() < LCD_COLS) window += ' ';
+  setScreenLine(marquee_row, window.substring(0, LCD_COLS));
+}
+
+void updateMarquee() {
+  if (!marquee_active || !connection_active || marquee_text.length() <= LCD_COLS) return;
+  if (millis() - marquee_last_step_time < marquee_step_ms) return;
+  marquee_last_step_time = millis();
+  marquee_offset = (marquee_offset + 1) % marquee_text.length();
+  showMarqueeWindow();
+}
+
+void sendAck(byte row) {
+  // CRC8 кадра (rx_crc, он только что сошёлся) говорит ПК, какую именно версию строки мы вывели
+  byte ack[2] = {row, rx_crc};
+  sendFrame(MSG_ACK, ack, 2);
+}
+
+void handleFrame(byte type, const byte* payload, byte length) {
+  if (type == MSG_IDLE_LINE && length >= 1) {
+    // Разностный кадр: ПК шлёт только изменившуюся строку текущего экрана
+    byte row = payload[0];
+    if (marquee_active && row == marquee_row) {
+      marquee_active = false; // Обычная строка заменяет бегущую
+    }
+    setScreenLine(row, payloadToString(payload, 1, length));
+    sendAck(row); // Подтверждаем, что строка на экране
+  } else if (type == MSG_MARQUEE && length >= 3) {
+    // Новая бегущая строка (или замена текущей): дальше сдвигаем её сами в updateMarquee()
+    byte row = payload[0];
+    marquee_row = row;
+    marquee_step_ms = payload[1] | (payload[2] << 8);
+    marquee_text = payloadToString(payload, 3, length);
+    marquee_offset = 0;
+    marquee_last_step_time = millis();
+    marquee_active = true;
+    showMarqueeWindow();
+    sendAck(row);
+  } else if (type == MSG_GLYPH && length == 9) {
+    // Свой символ (кириллица) в CGRAM. В строках ПК ссылается на него кодами 8-15, чтобы не слать байт 0
+    byte bitmap[8];
+    memcpy(bitmap, payload + 1, 8);
+    lcd.createChar(payload[0] & 0x07, bitmap);
+  } else if (type == MSG_BAUD_PROPOSE && length == 4) {
+    unsigned long rate = (unsigned long)payload[0] | ((unsigned long)payload[1] << 8) |
+                         ((unsigned long)payload[2] << 16) | ((unsigned long)payload[3] << 24);
+    boolean supported = isSupportedBaudRate(rate);
+    byte reply[4] = {0, 0, 0, 0};
+    if (supported) {
+      memcpy(reply, payload, 4);
+    }
+    sendFrame(MSG_BAUD_ACCEPT, reply, 4); // Отвечаем ещё на старой скорости
+    if (supported) {
+      switchBaudRate(rate);
+      baud_pending_confirm = true;
+      baud_switch_time = millis();
+    }
+  } else if (type == MSG_BAUD_TEST) {
+    sendFrame(MSG_BAUD_TEST, payload, length); // Эхо: ПК сверит байты
+  } else if (type == MSG_BAUD_CONFIRM) {
+    baud_pending_confirm = false;
+  } else if (type == MSG_HELLO_REQUEST) {
+    sendHello();
+  }
+  // MSG_KEEPALIVE: ничего не делаем, таймер соединения обновится в loop()
+}
+
+// Обрабатывает один байт из порта. Возвращает true, если собран и обработан корректный кадр.
+boolean feedFrameByte(byte b) {
+  switch (rx_state) {
+    case 0:
+      if (b == FRAME_SOF) rx_state = 1;
+      break;
+    case 1:
+      if (b == PROTOCOL_VERSION) {
+        rx_crc = crc8Update(0, b);
+        rx_state = 2;
+      } else if (b != FRAME_SOF) {
+        rx_state = 0;
+      }
+      break;
+    case 2:
+      rx_type = b;
+      rx_crc = crc8Update(rx_crc, b);
+      rx_state = 3;
+      break;
+    case 3:
+      rx_length = b;
+      rx_crc = crc8Update(rx_crc, b);
+      rx_index = 0;
+      if (b > MAX_FRAME_PAYLOAD) {
+        rx_state = 0;
+      } else {
+        rx_state = (b == 0) ? 5 : 4;
+      }
+      break;
+    case 4:
+      rx_payload[rx_index++] = b;
+      rx_crc = crc8Update(rx_crc, b);
+      if (rx_index == rx_length) rx_state = 5;
+      break;
+    case 5:
+      rx_state = 0;
+      if (b == rx_crc) {
+        handleFrame(rx_type, rx_payload, rx_length);
+        return true;
+      }
+      break;
+  }
+  return false;
+}
 
 void setup() {
   lcd.begin(16, 2);
   lcd.print("Waiting for PC...");
-  Serial.begin(9000); 
+  Serial.begin(BASE_BAUD_RATE);
+  sendHello(); // ПК подключается, как только услышит приветствие, без фиксированной паузы
   
   pinMode(BUTTON_A_PIN, INPUT_PULLUP); 
   pinMode(BUTTON_B_PIN, INPUT_PULLUP); 
 
   last_data_received_time = millis(); // Инициализируем таймер соединения
-
-  // Запрашиваем первую погоду при старте
-  Serial.print("REQ_WEATHER\n"); 
-  last_weather_request_time = millis();
 }
 
 void loop() {
@@ -73,23 +295,7 @@ void loop() {
     if (readingA != buttonAState) {
       buttonAState = readingA;
       if (buttonAState == LOW) { // Кнопка А нажата
-        if (displayMode == 0) { // В режиме ожидания: принудительное обновление погоды
-            Serial.print("REQ_WEATHER_FORCE\n"); 
-            lcd.clear(); 
-            lcd.setCursor(0,0); lcd.print("Updating weather");
-            lcd.setCursor(0,1); lcd.print("Please wait...");
-        } else if (displayMode == 1) { // В режиме прокрутки статистики: вернуться в ожидание
-            displayMode = 0;
-            statsSubMode = 0; // Сбрасываем подрежим
-            if (current_weather_line1.length() > 0) { // Показываем сразу погоду, если есть
-                lcd.clear();
-                lcd.setCursor(0, 0); lcd.print(current_weather_line1);
-                lcd.setCursor(0, 1); lcd.print(current_weather_line2);
-            } else { // Иначе запросим
-                Serial.print("REQ_WEATHER\n");
-                lcd.clear(); lcd.print("Loading weather");
-            }
-        }
+        sendButton(BUTTON_A);
       }
     }
   }
@@ -104,140 +310,47 @@ void loop() {
     if (readingB != buttonBState) {
       buttonBState = readingB;
       if (buttonBState == LOW) { // Кнопка Б нажата
-        if (displayMode != 1) { // Если не в режиме статистики, переключаемся
-            displayMode = 1; // Переходим в режим прокрутки статистики
-            statsSubMode = 0; // Начинаем с системных данных
-            Serial.print("REQ_SYSTEM_STATS\n"); // Запрашиваем системные данные
-            stats_display_start_time = millis(); // Запускаем таймер для режима статистики
-            lcd.clear(); 
-            lcd.setCursor(0,0); lcd.print("Loading stats..."); 
-        }
+        sendButton(BUTTON_B);
       }
     }
   }
   lastButtonBState = readingB;
 
-  // --- Автоматический запрос погоды (только в режиме ожидания) ---
-  if (displayMode == 0 && (millis() - last_weather_request_time > WEATHER_UPDATE_INTERVAL_ARDUINO_MS)) {
-      Serial.print("REQ_WEATHER\n");
-      last_weather_request_time = millis();
-      lcd.clear(); 
-      lcd.setCursor(0,0); lcd.print("Updating weather");
-      lcd.setCursor(0,1); lcd.print("Please wait...");
+  // --- Обработка данных из последовательного порта ---
+  // Читаем только уже пришедшие байты; кадр может собираться за несколько проходов loop()
+  boolean frame_received = false;
+  while (Serial.available()) {
+    if (feedFrameByte(Serial.read())) {
+      frame_received = true;
+    }
   }
 
-  // --- Автоматическая прокрутка и возврат из режима статистики ---
-  if (displayMode == 1 && (millis() - stats_display_start_time > SINGLE_CARD_DISPLAY_DURATION_MS)) {
-      stats_display_start_time = millis(); // Сбрасываем таймер для следующего перехода
-      statsSubMode++; // Переходим к следующему подрежиму
-      
-      if (statsSubMode == 1) { // Если были CPU/RAM/ROM, теперь показываем Network
-          Serial.print("REQ_NETWORK_INFO\n"); // Запрашиваем сетевые данные
-          lcd.clear();
-          lcd.setCursor(0,0); lcd.print("Loading network...");
-      } else { // После сетевой информации или если был только один режим: возвращаемся в ожидание
-          displayMode = 0; 
-          statsSubMode = 0; // Сбрасываем подрежим для следующего раза
-          if (current_weather_line1.length() > 0) { // Показываем сразу погоду, если есть
-              lcd.clear();
-              lcd.setCursor(0, 0); lcd.print(current_weather_line1);
-              lcd.setCursor(0, 1); lcd.print(current_weather_line2);
-          } else { // Иначе запросим
-              Serial.print("REQ_WEATHER\n");
-              lcd.clear(); lcd.print("Loading weather");
-          }
-      }
-  }
+  updateMarquee();
 
+  // ПК не подтвердил новую скорость - возвращаемся на базовую, он сделает то же самое
+  if (baud_pending_confirm && millis() - baud_switch_time > BAUD_CONFIRM_TIMEOUT_MS) {
+    baud_pending_confirm = false;
+    switchBaudRate(BASE_BAUD_RATE);
+  }
 
-  // --- Обработка данных из последовательного порта ---
-  if (Serial.available()) {
+  if (frame_received) {
     last_data_received_time = millis(); // Обновляем таймер, чтобы избежать "Connection lost"
     if (!connection_active) {
-      lcd.clear();
       connection_active = true;
+      redrawScreen(); // Убираем "Connection lost!" и показываем последние строки
     }
-
-    String received_line1_raw = Serial.readStringUntil('\n'); 
-    String received_line2_raw = Serial.readStringUntil('\n'); 
-
-    String received_line1; 
-    String received_line2; 
-
-    // Проверяем, есть ли префикс "IDLE:"
-    if (received_line1_raw.startsWith("IDLE:")) {
-        received_line1 = received_line1_raw.substring(5); // Удаляем "IDLE:"
-        received_line2 = received_line2_raw.substring(5); // Удаляем "IDLE:"
-        
-        current_weather_line1 = received_line1;
-        current_weather_line2 = received_line2;
-        
-        if (displayMode == 0) { // Только если в режиме ожидания, обновляем экран
-            lcd.clear();
-            lcd.setCursor(0, 0); lcd.print(current_weather_line1);
-            lcd.setCursor(0, 1); lcd.print(current_weather_line2);
-        }
-    } else { // Это обычный ответ на запрос (без "IDLE:")
-        received_line1 = received_line1_raw; 
-        received_line2 = received_line2_raw; 
-        
-        if (received_line1.startsWith("CPU:")) { // Это системные данные
-            current_system_line1 = received_line1;
-            current_system_line2 = received_line2;
-            if (displayMode == 1 && statsSubMode == 0) { // Если мы сейчас в режиме статистики и ждем CPU
-                lcd.clear(); 
-                lcd.setCursor(0, 0); lcd.print(current_system_line1);
-                lcd.setCursor(0, 1); lcd.print(current_system_line2);
-            }
-        // *** ИЗМЕНЕНО ЗДЕСЬ: "SSID:" на "WIFI:" ***
-        } else if (received_line1.startsWith("WIFI:") || received_line1.startsWith("No Network") || received_line1.startsWith("Error cmd")) { // Это сетевые данные
-            current_network_line1 = received_line1;
-            current_network_line2 = received_line2;
-            if (displayMode == 1 && statsSubMode == 1) { // Если мы сейчас в режиме статистики и ждем Network
-                lcd.clear(); 
-                lcd.setCursor(0, 0); lcd.print(current_network_line1);
-                lcd.setCursor(0, 1); lcd.print(current_network_line2);
-            }
-        } else { // Предполагаем, что это ответ на запрос погоды (дата/время + погода)
-            current_weather_line1 = received_line1;
-            current_weather_line2 = received_line2;
-            if (displayMode == 0) { // Если мы сейчас в режиме ожидания
-                lcd.clear();
-                lcd.setCursor(0, 0); lcd.print(current_weather_line1);
-                lcd.setCursor(0, 1); lcd.print(current_weather_line2);
-            }
-        }
-    }
-  } else { // Serial.available() == false (нет данных)
+  } else { // Целых кадров не пришло
     // Проверка таймаута для потери соединения с ПК
     if (millis() - last_data_received_time > CONNECTION_TIMEOUT) {
+      if (current_baud_rate != BASE_BAUD_RATE) {
+        switchBaudRate(BASE_BAUD_RATE); // Перезапущенный ПК начнёт согласование заново с базовой скорости
+      }
       if (connection_active || last_data_received_time == 0) { 
         lcd.clear();
         lcd.setCursor(0, 0); lcd.print("Connection lost!");
         lcd.setCursor(0, 1); lcd.print("Check PC.");
         connection_active = false;
       }
-    } else {
-        if (connection_active) {
-            if (displayMode == 0) { 
-                if (current_weather_line1.length() > 0) {
-                    lcd.setCursor(0, 0); lcd.print(current_weather_line1);
-                    lcd.setCursor(0, 1); lcd.print(current_weather_line2);
-                } else {
-                    lcd.clear(); lcd.setCursor(0,0); lcd.print("Waiting for data");
-                }
-            } else if (displayMode == 1) { 
-                if (statsSubMode == 0 && current_system_line1.length() > 0) { 
-                    lcd.setCursor(0, 0); lcd.print(current_system_line1);
-                    lcd.setCursor(0, 1); lcd.print(current_system_line2);
-                } else if (statsSubMode == 1 && current_network_line1.length() > 0) { 
-                    lcd.setCursor(0, 0); lcd.print(current_network_line1);
-                    lcd.setCursor(0, 1); lcd.print(current_network_line2);
-                } else {
-                    lcd.clear(); lcd.setCursor(0,0); lcd.print("Loading data...");
-                }
-            }
-        }
     }
   }
 }
\ No newline at end of file
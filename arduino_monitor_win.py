@@ -1,34 +1,39 @@
-import psutil
-import serial
-import time
-import sys
-import subprocess
-import socket
-import os
-from datetime import datetime
-import requests
+"""
+Монитор для Arduino с LCD 16x2 (Windows): настройки берутся из config.json рядом со скриптом,
+вся работа - в пакете monitor_core. Ключи config.json - имена настроек из monitor_core/config.py
+в нижнем регистре.
+"""
+
 import json
-import asyncio
-import random
-import string
-import aiohttp
-from yandex_music import ClientAsync
+import os
+import sys
+
+from monitor_core import app, config
 
 # --- Работа с конфигом ---
 CONFIG_FILE = "config.json"
+SKETCH_BASE_BAUD_RATE = 9600  # BASE_BAUD_RATE в arduino_monitor.ino
+LEGACY_BAUD_RATE = 9000       # Так было в config.json, созданных прежними версиями скрипта
 
 def load_or_create_config():
     default_config = {
-        "arduino_port": "COM3",
-        "baud_rate": 9000,
+        "arduino_port": "auto",
+        "baud_rate": 9600,
         "openweather_api_key": "YOUR_API_KEY",
         "city_id": "YOUR_CITY_ID",
         "yandex_music_token": "YOUR_TOKEN",
         "weather_update_interval_minutes": 15,
-        "music_check_interval_sec": 3,
         "idle_data_send_interval_sec": 0.5,
         "music_scroll_speed_sec": 0.2,
-        "disk_path": "C:\\"
+        "disk_path": "C:\\",
+        "system_stats_sample_interval_sec": 1,
+        "negotiated_baud_rates": [230400, 115200, 57600],
+        "transliteration_languages": ["ru", "uk", "be"],
+        "card_display_duration_sec": 5,
+        "card_cache_max_staleness_sec": 2,
+        "platform": "auto",
+        "history_file": None,
+        "metrics_port": 9105
     }
     
     if not os.path.exists(CONFIG_FILE):
@@ -57,508 +62,26 @@ def load_or_create_config():
     
     if config.get("yandex_music_token") == "YOUR_TOKEN":
         print("WARNING: Yandex Music token not set. Music feature disabled.")
-    
-    return config
-
-# --- Загрузка конфига ---
-config = load_or_create_config()
-
-arduino_port = config["arduino_port"]
-baud_rate = config["baud_rate"]
-OPENWEATHER_API_KEY = config["openweather_api_key"]
-CITY_ID = config["city_id"]
-YANDEX_MUSIC_TOKEN = config["yandex_music_token"]
-WEATHER_UPDATE_INTERVAL_MINUTES = config["weather_update_interval_minutes"]
-MUSIC_API_CHECK_INTERVAL_SEC = config["music_check_interval_sec"]
-IDLE_DATA_SEND_INTERVAL_SEC = config.get("idle_data_send_interval_sec", 0.5)
-MUSIC_SCROLL_SPEED_SEC = config.get("music_scroll_speed_sec", 0.2)
-DISK_PATH = config.get("disk_path", "C:\\")
-
-# --- Глобальная переменная для последовательного порта ---
-ser = None
-try:
-    ser = serial.Serial(arduino_port, baud_rate, timeout=0.1)
-    time.sleep(2)
-    print(f"Connected to Arduino on port {arduino_port}")
-except serial.SerialException:
-    print(f"ERROR: Could not connect to Arduino on port {arduino_port}")
-    print("Check the COM port in Device Manager and update config.json")
-    input("Press Enter to exit...")
-    sys.exit(1)
 
-# --- Глобальные переменные для погоды ---
-weather_data = {"description": "Unknown", "temperature": 0}
-weather_status = "READY"
-last_weather_api_update_time = 0
-
-# --- Таймер для периодической отправки данных ---
-last_idle_data_send_time = 0
-
-# --- Глобальные переменные для музыки ---
-current_track_info = {
-    "is_playing": False,
-    "is_paused": False,
-    "artist": "",
-    "title": "",
-    "full_string": "",
-    "scroll_offset": 0,
-    "last_scroll_time": 0
-}
-last_music_api_check_time = 0
-
-# --- Вспомогательные функции ---
-def bytes_to_gb(bytes_value):
-    return round(bytes_value / (1024**3), 1)
-
-def get_system_stats():
-    cpu_percent = psutil.cpu_percent(interval=0.1)
-    ram = psutil.virtual_memory()
-    ram_used_gb = bytes_to_gb(ram.used)
-    disk = psutil.disk_usage(DISK_PATH)
-    disk_used_gb = bytes_to_gb(disk.used)
-    disk_total_gb = bytes_to_gb(disk.total)
-    cpu_ram_str = f"CPU:{cpu_percent:2.0f}% RAM:{ram_used_gb:4.1f}"
-    cpu_ram_str = cpu_ram_str.ljust(16)[:16]
-    rom_str = f"ROM:{disk_used_gb:4.1f}GB/{disk_total_gb:4.1f}GB"
-    rom_str = rom_str.ljust(16)[:16]
-    return cpu_ram_str, rom_str
-
-def get_network_info(interface=None):
-    """Получает информацию о сети для Windows"""
-    ssid = "No Network"
-    ip_address = "No IP"
-    
-    try:
-        result = subprocess.check_output(
-            ['netsh', 'wlan', 'show', 'interfaces'],
-            text=True,
-            stderr=subprocess.DEVNULL,
-            encoding='cp866',
-            errors='ignore'
-        )
-        for line in result.splitlines():
-            line_stripped = line.strip()
-            if ("SSID" in line_stripped or "SSID" in line_stripped) and "BSSID" not in line_stripped:
-                parts = line_stripped.split(":", 1)
-                if len(parts) > 1:
-                    ssid = parts[1].strip()
-                    break
-    except (subprocess.CalledProcessError, FileNotFoundError, Exception) as e:
-        print(f"DEBUG: Error getting SSID: {e}")
-        ssid = "Error"
-    
-    try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.settimeout(2)
-        s.connect(("8.8.8.8", 80))
-        ip_address = s.getsockname()[0]
-        s.close()
-    except Exception as e:
-        print(f"DEBUG: Error getting IP: {e}")
-        ip_address = "No IP"
-    
-    print(f"DEBUG: get_network_info returning: SSID='{ssid}', IP='{ip_address}'")
+    # 9000 отличается от скорости скетча на 6%: связи нет, а ошибок никто не увидит
+    if config.get("baud_rate") == LEGACY_BAUD_RATE:
+        config["baud_rate"] = SKETCH_BASE_BAUD_RATE
+        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=4, ensure_ascii=False)
+        print(f"baud_rate {LEGACY_BAUD_RATE} changed to {SKETCH_BASE_BAUD_RATE} in {CONFIG_FILE} (the sketch runs at {SKETCH_BASE_BAUD_RATE})")
+    elif config.get("baud_rate", SKETCH_BASE_BAUD_RATE) != SKETCH_BASE_BAUD_RATE:
+        print(f"WARNING: baud_rate {config['baud_rate']} in {CONFIG_FILE} differs from BASE_BAUD_RATE "
+              f"{SKETCH_BASE_BAUD_RATE} in the sketch. The Arduino will not be found unless the sketch uses the same rate.")
     
-    ssid_str = f"WIFI:{ssid}"
-    ssid_str = ssid_str.ljust(16)[:16]
-    ip_str = ip_address.ljust(16)[:16]
-    return ssid_str, ip_str
-
-def get_current_time_and_date_compact():
-    now = datetime.now()
-    date_str = now.strftime("%d/%m")
-    time_str = now.strftime("%H:%M")
-    return date_str, time_str
-
-def get_current_time_and_date_full():
-    now = datetime.now()
-    date_str = now.strftime("%d/%m/%y")
-    time_str = now.strftime("%H:%M")
-    spaces = 16 - len(date_str) - len(time_str)
-    if spaces < 1:
-        spaces = 1
-    line1 = f"{date_str}{' ' * spaces}{time_str}"
-    return line1.ljust(16)[:16]
-
-def transliterate_cyrillic(text):
-    mapping = {
-        'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
-        'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
-        'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
-        'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
-        'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
-        'А': 'A', 'Б': 'B', 'В': 'V', 'Г': 'G', 'Д': 'D', 'Е': 'E', 'Ё': 'Yo',
-        'Ж': 'Zh', 'З': 'Z', 'И': 'I', 'Й': 'Y', 'К': 'K', 'Л': 'L', 'М': 'M',
-        'Н': 'N', 'О': 'O', 'П': 'P', 'Р': 'R', 'С': 'S', 'Т': 'T', 'У': 'U',
-        'Ф': 'F', 'Х': 'Kh', 'Ц': 'Ts', 'Ч': 'Ch', 'Ш': 'Sh', 'Щ': 'Sch',
-        'Ъ': '', 'Ы': 'Y', 'Ь': '', 'Э': 'E', 'Ю': 'Yu', 'Я': 'Ya'
-    }
-    trans_text = ""
-    for char in text:
-        trans_text += mapping.get(char, char)
-    return trans_text
-
-# --- Функции для погоды ---
-def update_weather_data_func():
-    global weather_data, weather_status, last_weather_api_update_time
-    weather_status = "UPDATING"
-    print("Updating weather data...")
-    url = f"http://api.openweathermap.org/data/2.5/weather?id={CITY_ID}&appid={OPENWEATHER_API_KEY}&units=metric&lang=en"
-    try:
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-
-        temp = round(data['main']['temp'])
-        description_raw = data['weather'][0]['description']
-
-        description_map = {
-            "clear sky": "Ясно",
-            "few clouds": "Мало обл",
-            "scattered clouds": "Облачно",
-            "broken clouds": "Облачно",
-            "overcast clouds": "Пасмурно",
-            "shower rain": "Ливень",
-            "rain": "Дождь",
-            "light rain": "Л Дождь",
-            "moderate rain": "Дождь",
-            "heavy intensity rain": "Сильн до",
-            "thunderstorm": "Гроза",
-            "snow": "Снег",
-            "mist": "Туман",
-            "mists": "Туман",
-            "fog": "Туман",
-            "haze": "Дымка",
-            "sleet": "Мокрый сн",
-            "light shower snow": "Л Снегопад",
-            "heavy shower snow": "Сильн сн",
-            "rain and snow": "Дождь/Сн"
-        }
-
-        description = description_map.get(description_raw.lower(), description_raw)
-        description = transliterate_cyrillic(description)
-
-        if len(description) > 10:
-            description = description[:10]
-
-        weather_data["description"] = description
-        weather_data["temperature"] = temp
-        weather_status = "READY"
-        last_weather_api_update_time = time.time()
-        print(f"Weather updated: {description}, {temp}C")
-    except requests.exceptions.RequestException as e:
-        weather_status = "FAILED"
-        print(f"Error updating weather: {e}")
-        weather_data["description"] = transliterate_cyrillic("Ошибка")
-        weather_data["temperature"] = -999
-    except json.JSONDecodeError:
-        weather_status = "FAILED"
-        print("Error decoding weather JSON response.")
-        weather_data["description"] = transliterate_cyrillic("JSON Err")
-        weather_data["temperature"] = -999
-    except KeyError as e:
-        weather_status = "FAILED"
-        print(f"Error parsing weather data (missing key): {e}")
-        weather_data["description"] = transliterate_cyrillic("Ошибка")
-        weather_data["temperature"] = -999
-
-def get_weather_line_for_display():
-    if weather_status == "UPDATING":
-        return transliterate_cyrillic("Обновляю...")
-    elif weather_status == "FAILED":
-        return transliterate_cyrillic("Погода: Ошибка!")
-    else:
-        desc = weather_data["description"]
-        temp = weather_data["temperature"]
-        temp_str = f"{temp:+d}C"
-
-        available_space = 16 - len(desc) - len(temp_str)
-        if available_space < 1:
-            desc = desc[:(16 - len(temp_str) - 1)]
-            available_space = 16 - len(desc) - len(temp_str)
-
-        weather_line = f"{desc}{' ' * available_space}{temp_str}"
-        return weather_line.ljust(16)[:16]
-
-# --- Функции для Яндекс.Музыки ---
-async def get_current_track_ym(client_ym, token):
-    device_info = {
-        "app_name": "Chrome",
-        "type": 1,
-    }
-
-    ws_proto = {
-        "Ynison-Device-Id": "".join(
-            [random.choice(string.ascii_lowercase) for _ in range(16)]
-        ),
-        "Ynison-Device-Info": json.dumps(device_info),
-    }
-
-    timeout = aiohttp.ClientTimeout(total=15, connect=10)
-    try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.ws_connect(
-                url="wss://ynison.music.yandex.ru/redirector.YnisonRedirectService/GetRedirectToYnison",
-                headers={
-                    "Sec-WebSocket-Protocol": f"Bearer, v2, {json.dumps(ws_proto)}",
-                    "Origin": "http://music.yandex.ru",
-                    "Authorization": f"OAuth {token}",
-                },
-                timeout=10,
-            ) as ws:
-                recv = await ws.receive()
-                data = json.loads(recv.data)
-
-            if "redirect_ticket" not in data or "host" not in data:
-                return {"success": False}
-
-            new_ws_proto = ws_proto.copy()
-            new_ws_proto["Ynison-Redirect-Ticket"] = data["redirect_ticket"]
-
-            to_send = {
-                "update_full_state": {
-                    "player_state": {
-                        "player_queue": {
-                            "current_playable_index": -1,
-                            "entity_id": "",
-                            "entity_type": "VARIOUS",
-                            "playable_list": [],
-                            "options": {"repeat_mode": "NONE"},
-                            "entity_context": "BASED_ON_ENTITY_BY_DEFAULT",
-                            "version": {
-                                "device_id": ws_proto["Ynison-Device-Id"],
-                                "version": 9021243204784341000,
-                                "timestamp_ms": 0,
-                            },
-                            "from_optional": "",
-                        },
-                        "status": {
-                            "duration_ms": 0,
-                            "paused": True,
-                            "playback_speed": 1,
-                            "progress_ms": 0,
-                            "version": {
-                                "device_id": ws_proto["Ynison-Device-Id"],
-                                "version": 8321822175199937000,
-                                "timestamp_ms": 0,
-                            },
-                        },
-                    },
-                    "device": {
-                        "capabilities": {
-                            "can_be_player": True,
-                            "can_be_remote_controller": False,
-                            "volume_granularity": 16,
-                        },
-                        "info": {
-                            "device_id": ws_proto["Ynison-Device-Id"],
-                            "type": "WEB",
-                            "title": "Chrome Browser",
-                            "app_name": "Chrome",
-                        },
-                        "volume_info": {"volume": 0},
-                        "is_shadow": True,
-                    },
-                    "is_currently_active": False,
-                },
-                "rid": "ac281c26-a047-4419-ad00-e4fbfda1cba3",
-                "player_action_timestamp_ms": 0,
-                "activity_interception_type": "DO_NOT_INTERCEPT_BY_DEFAULT",
-            }
-
-            async with session.ws_connect(
-                url=f"wss://{data['host']}/ynison_state.YnisonStateService/PutYnisonState",
-                headers={
-                    "Sec-WebSocket-Protocol": f"Bearer, v2, {json.dumps(new_ws_proto)}",
-                    "Origin": "http://music.yandex.ru",
-                    "Authorization": f"OAuth {token}",
-                },
-                timeout=10,
-                method="GET",
-            ) as ws:
-                await ws.send_str(json.dumps(to_send))
-                recv = await asyncio.wait_for(ws.receive(), timeout=10)
-                ynison = json.loads(recv.data)
-
-                track_index = ynison["player_state"]["player_queue"]["current_playable_index"]
-                is_paused = ynison["player_state"]["status"]["paused"]
-
-                if track_index == -1:
-                    return {"success": False, "is_paused": is_paused}
-
-                track = ynison["player_state"]["player_queue"]["playable_list"][track_index]
-
-            await session.close()
-            track_full_info = await client_ym.tracks(track["playable_id"])
-            return {
-                "paused": is_paused,
-                "track": track_full_info,
-                "success": True,
-            }
-
-    except Exception as e:
-        return {"success": False, "error": str(e), "track": None}
-
-# --- Асинхронные задачи ---
-async def weather_update_task():
-    global last_weather_api_update_time
-    while True:
-        current_time = time.time()
-        if (current_time - last_weather_api_update_time) > (WEATHER_UPDATE_INTERVAL_MINUTES * 60) or weather_status == "FAILED":
-            update_weather_data_func()
-        await asyncio.sleep(60)
-
-async def music_status_update_task():
-    global current_track_info, last_music_api_check_time
-
-    # Если токен не задан — пропускаем
-    if YANDEX_MUSIC_TOKEN == "YOUR_TOKEN":
-        print("Yandex Music disabled (no token)")
-        while True:
-            await asyncio.sleep(60)
-
-    ym_client = ClientAsync(YANDEX_MUSIC_TOKEN)
-    try:
-        await ym_client.init()
-        print("Yandex Music client initialized")
-    except Exception as e:
-        print(f"Failed to initialize Yandex Music client: {e}")
-        current_track_info["is_playing"] = False
-        current_track_info["full_string"] = "YM Error!"
-        while True:
-            await asyncio.sleep(MUSIC_API_CHECK_INTERVAL_SEC)
-
-    while True:
-        current_time = time.time()
-
-        if (current_time - last_music_api_check_time) > MUSIC_API_CHECK_INTERVAL_SEC:
-            res = await get_current_track_ym(ym_client, YANDEX_MUSIC_TOKEN)
-
-            if res["success"] and not res["paused"]:
-                track = res["track"][0]
-                artist_names = ", ".join([artist["name"] for artist in track["artists"]])
-                title = track["title"]
-
-                transliterated_artist = transliterate_cyrillic(artist_names)
-                transliterated_title = transliterate_cyrillic(title)
-
-                full_text = f"{transliterated_artist} - {transliterated_title}"
-                if len(full_text) > 16:
-                    full_text = full_text + "         "
-
-                if current_track_info["title"] != transliterated_title or current_track_info["artist"] != transliterated_artist:
-                    current_track_info["scroll_offset"] = 0
-
-                current_track_info["is_playing"] = True
-                current_track_info["is_paused"] = False
-                current_track_info["artist"] = transliterated_artist
-                current_track_info["title"] = transliterated_title
-                current_track_info["full_string"] = full_text
-            else:
-                current_track_info["is_playing"] = False
-                current_track_info["is_paused"] = res.get("paused", False)
-                current_track_info["artist"] = ""
-                current_track_info["title"] = ""
-                current_track_info["full_string"] = ""
-                current_track_info["scroll_offset"] = 0
-
-            last_music_api_check_time = current_time
-
-        if current_track_info["is_playing"] and len(current_track_info["full_string"]) > 16:
-            current_time = time.time()
-            if (current_time - current_track_info["last_scroll_time"]) > MUSIC_SCROLL_SPEED_SEC:
-                current_track_info["scroll_offset"] = (current_track_info["scroll_offset"] + 1) % len(current_track_info["full_string"])
-                current_track_info["last_scroll_time"] = current_time
-        elif not current_track_info["is_playing"]:
-            current_track_info["scroll_offset"] = 0
-
-        await asyncio.sleep(0.1)
-
-async def arduino_communication_task():
-    global ser, current_track_info, last_idle_data_send_time
-
-    if ser is None:
-        print("Serial port not initialized. Exiting.")
-        return
-
-    while True:
-        try:
-            current_time = time.time()
-            if (current_time - last_idle_data_send_time) > IDLE_DATA_SEND_INTERVAL_SEC:
-                line1_to_send = ""
-                line2_to_send = ""
-
-                if current_track_info["is_playing"]:
-                    date_str_compact, time_str_compact = get_current_time_and_date_compact()
-                    temp_str = f"{weather_data['temperature']:+d}C"
-
-                    line1_to_send = f"{date_str_compact} {time_str_compact} {temp_str}".ljust(16)[:16]
-
-                    scroll_len = 16
-                    full_str = current_track_info["full_string"]
-                    offset = current_track_info["scroll_offset"]
-
-                    if len(full_str) > scroll_len:
-                        display_str = full_str[offset:] + full_str[:offset]
-                        line2_to_send = display_str[:scroll_len]
-                    else:
-                        line2_to_send = full_str.ljust(scroll_len)[:scroll_len]
-
-                else:
-                    line1_to_send = get_current_time_and_date_full()
-                    line2_to_send = get_weather_line_for_display()
-
-                ser.write(f"IDLE:{line1_to_send}\n".encode('utf-8'))
-                ser.write(f"IDLE:{line2_to_send}\n".encode('utf-8'))
-
-                last_idle_data_send_time = current_time
-
-            if ser.in_waiting > 0:
-                command = ser.readline().decode('utf-8').strip()
-                print(f"Received: '{command}'")
-
-                if command == "REQ_WEATHER" or command == "REQ_WEATHER_FORCE":
-                    update_weather_data_func()
-
-                elif command == "REQ_SYSTEM_STATS":
-                    line1, line2 = get_system_stats()
-                    ser.write(f"{line1}\n".encode('utf-8'))
-                    ser.write(f"{line2}\n".encode('utf-8'))
-                    print(f"Sent: '{line1}', '{line2}'")
-
-                elif command == "REQ_NETWORK_INFO":
-                    line1, line2 = get_network_info()
-                    ser.write(f"{line1}\n".encode('utf-8'))
-                    ser.write(f"{line2}\n".encode('utf-8'))
-                    print(f"Sent: '{line1}', '{line2}'")
-
-        except serial.SerialException as e:
-            print(f"Serial error: {e}")
-            break
-        except Exception as e:
-            print(f"Error: {e}")
-            break
+    return config
 
-        await asyncio.sleep(0.01)
+# --- Запуск программы ---
+if __name__ == "__main__":
+    settings = load_or_create_config()
+    config.configure(**config.from_json(settings))
 
-async def main():
     print("Starting Arduino Monitor...")
-    print(f"Port: {arduino_port}, Baud: {baud_rate}")
-    print(f"Weather updates every {WEATHER_UPDATE_INTERVAL_MINUTES} min")
+    print(f"Port: {config.ARDUINO_PORT}, Baud: {config.BAUD_RATE}")
+    print(f"Weather updates every {config.WEATHER_UPDATE_INTERVAL_MINUTES} min")
     print("-" * 40)
-    
-    await asyncio.gather(
-        weather_update_task(),
-        music_status_update_task(),
-        arduino_communication_task()
-    )
-
-if __name__ == "__main__":
-    try:
-        asyncio.run(main())
-    except KeyboardInterrupt:
-        print("\nStopped by user.")
-    finally:
-        if ser and ser.is_open:
-            ser.close()
-            print("Arduino disconnected.")
\ No newline at end of file
+    app.run()
@@ -0,0 +1,3 @@
+"""
+Замеры горячих участков монитора без Arduino и сети: python -m benchmarks (см. __main__.py).
+"""
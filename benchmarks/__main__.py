@@ -0,0 +1,312 @@
+"""
+Замеры горячих участков: транслитерация, вёрстка экранов, кириллица в CGRAM,
+кодирование и разбор кадров протокола.
+
+Для каждого замера выводятся операции в секунду и память по tracemalloc: пик за
+пачку вызовов и сколько байт на вызов остаётся занятым. Источники данных (часы,
+погода, трек, метрики ПК) подменены постоянными значениями, поэтому результаты
+не зависят от времени суток, сети и Arduino.
+
+    python -m benchmarks                    # замер
+    python -m benchmarks --save             # замер и запись базовой линии в benchmarks/baseline.json
+    python -m benchmarks --compare          # сравнение с базовой линией; код выхода 1 при регрессии
+    python -m benchmarks -k render          # только замеры, в имени которых есть "render"
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+
+from monitor_core import display, glyphs, history, protocol, renderer, scheduler, transliteration
+from monitor_core.sources import music, network, system, weather
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+MIN_TIME_SEC = 0.2           # Сколько минимум длится одно повторение замера скорости
+REPEATS = 5                  # Берётся лучшее из повторений
+ALLOC_CALLS = 1000           # Вызовов в пачке для замера памяти
+REGRESSION_TOLERANCE = 0.2   # Во сколько раз (доля) можно стать медленнее или прожорливее без тревоги
+ALLOC_SLACK_BYTES = 256      # Мелкие колебания пика памяти регрессией не считаются
+
+TRACK = "Мумий Тролль - Владивосток 2000"
+WEATHER_FIELDS = {"weather_status": "READY", "weather_description": "Пасмурно", "temperature": -3}
+
+
+# --- Подмена источников данных ---
+class FixedDateTime(datetime):
+    """datetime, у которого now() всегда одно и то же время."""
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2024, 12, 31, 23, 59, 30)
+
+
+def stub_sources():
+    scheduler.datetime = FixedDateTime
+    weather.weather_status = "READY"
+    weather.weather_data.update(description="Пасмурно", temperature=-3)
+    music.current_track_info.update(is_playing=False, is_paused=False, artist="", title="", full_string="")
+    network.network_info_cache.update(ssid="Дом 5G", ip="192.168.1.42")
+    system.system_stats_samples.clear()
+    system.system_stats_samples.append({
+        "time": 0, "cpu_percent": 12.5, "ram_used": 3 * 1024**3, "ram_total": 16 * 1024**3,
+        "disk_used": 87 * 1024**3, "disk_total": 234 * 1024**3,
+    })
+    for second in range(3 * 3600):  # Три часа истории, замер в секунду
+        history.record({"time": second, "cpu_percent": second % 100, "ram_used": 3 * 1024**3, "disk_used": 87 * 1024**3})
+
+
+# --- Прежние реализации, для сравнения с текущими ---
+def legacy_transliterate(text):
+    """Транслитерация до оптимизации: словарь на каждый вызов и склейка строки по символу."""
+    mapping = {
+        'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
+        'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+        'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+        'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
+        'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+        'А': 'A', 'Б': 'B', 'В': 'V', 'Г': 'G', 'Д': 'D', 'Е': 'E', 'Ё': 'Yo',
+        'Ж': 'Zh', 'З': 'Z', 'И': 'I', 'Й': 'Y', 'К': 'K', 'Л': 'L', 'М': 'M',
+        'Н': 'N', 'О': 'O', 'П': 'P', 'Р': 'R', 'С': 'S', 'Т': 'T', 'У': 'U',
+        'Ф': 'F', 'Х': 'Kh', 'Ц': 'Ts', 'Ч': 'Ch', 'Ш': 'Sh', 'Щ': 'Sch',
+        'Ъ': '', 'Ы': 'Y', 'Ь': '', 'Э': 'E', 'Ю': 'Yu', 'Я': 'Ya'
+    }
+    trans_text = ""
+    for char in text:
+        trans_text += mapping.get(char, char)
+    return trans_text
+
+
+# --- Замеры ---
+def bench_transliterate_legacy():
+    if legacy_transliterate(TRACK) != transliteration.transliterate(TRACK):
+        raise RuntimeError("transliterate() no longer matches the legacy output")
+    return lambda: legacy_transliterate(TRACK)
+
+
+def bench_transliterate_cached():
+    return lambda: transliteration.transliterate(TRACK)
+
+
+def bench_transliterate_uncached():
+    translate = transliteration._transliterate_cached.__wrapped__
+    return lambda: translate(TRACK)
+
+
+def bench_weather_line():
+    return lambda: renderer.weather_line("READY", "Пасмурно", -3)
+
+
+def bench_render_clock_weather():
+    """Экран ожидания, когда каждый раз меняется время: одна строка пересобирается, другая из кэша."""
+    screen_renderer = renderer.Renderer()
+    clocks = [dict(WEATHER_FIELDS, date_full="31/12/24", time=f"23:{minute:02d}") for minute in range(60)]
+    state = {"i": 0}
+
+    def run():
+        state["i"] = (state["i"] + 1) % len(clocks)
+        return screen_renderer.render(renderer.CLOCK_WEATHER, clocks[state["i"]])
+    return run
+
+
+def bench_render_unchanged():
+    screen_renderer = renderer.Renderer()
+    fields = dict(WEATHER_FIELDS, date_full="31/12/24", time="23:59")
+    return lambda: screen_renderer.render(renderer.CLOCK_WEATHER, fields)
+
+
+def bench_clock_fields():
+    return scheduler.get_clock_fields
+
+
+def bench_idle_frame():
+    """Кадр экрана ожидания целиком: часы, погода, трек попеременно играет и стоит на паузе."""
+    def run():
+        music.current_track_info["is_playing"] = not music.current_track_info["is_playing"]
+        music.current_track_info["full_string"] = TRACK
+        return scheduler.build_idle_frame()
+    return run
+
+
+def bench_stats_card():
+    return lambda: scheduler.build_card("system_stats", 0)
+
+
+def bench_history_record():
+    """Один замер в историю: три ряда, в каждом три уровня."""
+    sample = {"time": 3 * 3600, "cpu_percent": 12.5, "ram_used": 3 * 1024**3, "disk_used": 87 * 1024**3}
+
+    def run():
+        sample["time"] += 1
+        history.record(sample)
+    return run
+
+
+def bench_history_card():
+    """Карточка графика CPU: сводка и средние за 16 минут, график из столбиков."""
+    return lambda: scheduler.build_card("cpu_history", 0)
+
+
+def bench_glyph_render():
+    """Кириллица в CGRAM: два кадра по очереди, каждый раз часть букв перезагружается."""
+    manager = glyphs.GlyphManager()
+    frames = [("31/12/24   23:59", "Пасмурно     -3C"), ("31/12 23:59 -3C", TRACK)]
+    state = {"i": 0}
+
+    def run():
+        state["i"] ^= 1
+        return manager.render(frames[state["i"]])
+    return run
+
+
+def bench_marquee_encode():
+    """Бегущая строка трека (прежняя нарезка окна прокрутки теперь на Arduino): кадр MSG_MARQUEE."""
+    text = glyphs.fallback_encode(TRACK)
+    return lambda: display.encode_idle_row(1, ("marquee", text))
+
+
+def bench_encode_idle_line():
+    return lambda: protocol.encode_idle_line(0, "31/12/24   23:59")
+
+
+def bench_encode_card():
+    return lambda: protocol.encode_card(protocol.MSG_SYSTEM_STATS, "CPU:12% RAM: 3.0", "ROM:87.0GB/234.0GB")
+
+
+def bench_decode_stream():
+    """Разбор потока от Arduino кусками по 7 байт, как их отдаёт порт: подтверждения и кнопки."""
+    stream = b"".join([protocol.encode_frame(protocol.MSG_ACK, bytes((row % 2,))) for row in range(32)]
+                      + [protocol.encode_frame(protocol.MSG_BUTTON, bytes((protocol.BUTTON_B,)))] * 8)
+    chunks = [stream[i:i + 7] for i in range(0, len(stream), 7)]
+    decoder = protocol.FrameDecoder()
+
+    def run():
+        for chunk in chunks:
+            decoder.feed(chunk)
+    return run
+
+
+BENCHMARKS = {
+    "transliterate_legacy": bench_transliterate_legacy,
+    "transliterate_cached": bench_transliterate_cached,
+    "transliterate_uncached": bench_transliterate_uncached,
+    "weather_line": bench_weather_line,
+    "render_clock_weather": bench_render_clock_weather,
+    "render_unchanged": bench_render_unchanged,
+    "clock_fields": bench_clock_fields,
+    "idle_frame": bench_idle_frame,
+    "stats_card": bench_stats_card,
+    "history_record": bench_history_record,
+    "history_card": bench_history_card,
+    "glyph_render": bench_glyph_render,
+    "marquee_encode": bench_marquee_encode,
+    "encode_idle_line": bench_encode_idle_line,
+    "encode_card": bench_encode_card,
+    "decode_stream": bench_decode_stream,
+}
+
+
+# --- Измерение ---
+def measure_speed(func):
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < MIN_TIME_SEC:
+        number *= 2
+    best = min(timer.repeat(REPEATS, number))
+    return number / best
+
+
+def measure_memory(func):
+    """Пик памяти за ALLOC_CALLS вызовов и сколько байт на вызов осталось занятым после них."""
+    func()  # Прогрев: кэши и ленивые таблицы не считаются
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(ALLOC_CALLS):
+            func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - start, (current - start) / ALLOC_CALLS
+
+
+def run_benchmarks(selected):
+    stub_sources()
+    results = {}
+    print(f"{'benchmark':<26}{'ops/s':>14}{'peak, B':>10}{'kept B/op':>11}")
+    for name in selected:
+        func = BENCHMARKS[name]()
+        ops = measure_speed(func)
+        peak, kept = measure_memory(BENCHMARKS[name]())
+        results[name] = {"ops_per_sec": ops, "peak_bytes": peak, "retained_bytes_per_op": kept}
+        print(f"{name:<26}{ops:>14,.0f}{peak:>10}{kept:>11.1f}")
+    return results
+
+
+# --- Базовая линия ---
+def save_baseline(results, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }, f, indent=4)
+    print(f"Baseline saved to {path}")
+
+
+def compare_with_baseline(results, path):
+    """Печатает разницу с базовой линией. Возвращает число регрессий или None, если базовой линии нет."""
+    if not os.path.exists(path):
+        print(f"No baseline at {path}, run with --save first")
+        return None
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("python") != platform.python_version():
+        print(f"Note: baseline was recorded on Python {baseline.get('python')}, now {platform.python_version()}")
+
+    regressions = 0
+    print(f"\n{'benchmark':<26}{'speed':>10}{'peak, B':>18}  verdict")
+    for name, now in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<26}{'':>10}{'':>18}  new")
+            continue
+        speed = now["ops_per_sec"] / before["ops_per_sec"]
+        slower = speed < 1 - REGRESSION_TOLERANCE
+        hungrier = now["peak_bytes"] > before["peak_bytes"] * (1 + REGRESSION_TOLERANCE) + ALLOC_SLACK_BYTES
+        verdict = ", ".join(word for word, bad in (("SLOWER", slower), ("MORE MEMORY", hungrier)) if bad) or "ok"
+        regressions += slower or hungrier
+        peak = f"{before['peak_bytes']} -> {now['peak_bytes']}"
+        print(f"{name:<26}{speed:>9.2f}x{peak:>18}  {verdict}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-k", dest="pattern", default="", help="run only benchmarks whose name contains this")
+    parser.add_argument("--save", nargs="?", const=BASELINE_FILE, metavar="FILE", help="save results as the baseline")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_FILE, metavar="FILE", help="compare with a baseline")
+    args = parser.parse_args()
+
+    selected = [name for name in BENCHMARKS if args.pattern in name]
+    if not selected:
+        parser.error(f"no benchmark matches '{args.pattern}'")
+    results = run_benchmarks(selected)
+    if args.save:
+        save_baseline(results, args.save)
+    if args.compare:
+        regressions = compare_with_baseline(results, args.compare)
+        if regressions is None:
+            sys.exit(2)
+        if regressions:
+            print(f"{regressions} regression(s) against {args.compare}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
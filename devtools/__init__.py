@@ -0,0 +1 @@
+"""Инструменты разработчика: проверка монитора без Arduino (см. virtual_arduino.py)."""
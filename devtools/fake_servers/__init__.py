@@ -0,0 +1,6 @@
+"""
+Подставные OpenWeatherMap, API Яндекс.Музыки и Ynison для проверки сетевой части без интернета
+(см. server.py, запуск: python -m devtools.fake_servers).
+"""
+
+from .server import FakeServers
@@ -0,0 +1,54 @@
+"""
+Подставные сервисы погоды и музыки на локальном порту:
+
+    python -m devtools.fake_servers                                    # чистые ответы, трек меняется каждые 20 с
+    python -m devtools.fake_servers --latency 0.5 --jitter 0.5         # медленная сеть
+    python -m devtools.fake_servers --error-rate 0.3 --hang-rate 0.05  # сбои и таймауты
+    python -m devtools.fake_servers --ws-drop-after 15                 # обрыв Ynison каждые 15 с (переподключение)
+
+Печатает настройки, которые нужно прописать в arduino_monitor.py (или в config.json на Windows),
+чтобы монитор ходил сюда вместо интернета.
+"""
+
+import argparse
+import asyncio
+
+from .server import FakeServers
+
+
+async def serve(servers):
+    await servers.start()
+    print(f"Fake servers listening on {servers.url}")
+    print("Monitor settings:")
+    for name, value in servers.settings().items():
+        print(f"    {name} = {value!r}")
+    print(f"Request counters: {servers.url}/_stats")
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m devtools.fake_servers", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="share of requests that never answer in time")
+    parser.add_argument("--ws-frame-delay", type=float, default=0.0, help="seconds before every Ynison state frame")
+    parser.add_argument("--ws-drop-after", type=float, default=None, help="close the Ynison state socket after N seconds")
+    parser.add_argument("--track-interval", type=float, default=20.0, help="switch tracks every N seconds (0 disables)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for latency and error injection")
+    args = parser.parse_args()
+
+    servers = FakeServers(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, hang_rate=args.hang_rate,
+                          ws_frame_delay=args.ws_frame_delay, ws_drop_after=args.ws_drop_after,
+                          track_interval=args.track_interval or None, seed=args.seed)
+    try:
+        asyncio.run(serve(servers))
+    except KeyboardInterrupt:
+        print("Fake servers stopped.")
+
+
+if __name__ == "__main__":
+    main()
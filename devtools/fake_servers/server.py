@@ -0,0 +1,231 @@
+"""
+Подставные сервисы на одном локальном порту (aiohttp.web):
+
+    GET  /data/2.5/weather                    OpenWeatherMap, ответ из recordings/weather.json
+    GET  /account/status                      API Яндекс.Музыки: ClientAsync.init()
+    POST /tracks                              API Яндекс.Музыки: client.tracks(), треки из recordings/tracks.json
+    WS   /redirector.YnisonRedirectService/GetRedirectToYnison   редирект Ynison на этот же сервер
+    WS   /ynison_state.YnisonStateService/PutYnisonState         состояние плеера, recordings/ynison_state.json
+    GET  /_stats                              сколько запросов пришло на каждый адрес
+
+Ответы берутся из записанных ответов настоящих сервисов. Неисправности задаются в faults
+и меняются на ходу: задержка ответа с разбросом, доля ответов 503, доля "зависших" запросов
+(ответ позже любого таймаута клиента), задержка каждого кадра WebSocket и обрыв сокета
+состояния через заданное время. Случайность берётся из Random(seed), поэтому прогон с тем же
+seed повторяет ту же последовательность ошибок. Смена треков - по расписанию (track_interval)
+или вызовом push_track().
+"""
+
+import asyncio
+import copy
+import json
+import os
+import random
+import threading
+import uuid
+
+from aiohttp import web
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(__file__), "recordings")
+HANG_SEC = 120  # "Зависший" запрос: дольше любого таймаута клиента
+FAKE_TOKEN = "fake-token"
+FAKE_CITY_ID = "524901"
+YNISON_PROTOCOLS = ("Bearer",)  # Клиент передаёт токен и данные устройства в Sec-WebSocket-Protocol
+
+
+def load_recording(name):
+    with open(os.path.join(RECORDINGS_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+class FakeServers:
+    """Подставные сервисы; настройки неисправностей в faults можно менять во время прогона."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, hang_rate=0.0,
+                 ws_frame_delay=0.0, ws_drop_after=None, track_interval=None, seed=0):
+        self.host = host
+        self.port = port
+        self.faults = {
+            "latency": latency,                # Секунды перед каждым ответом
+            "jitter": jitter,                  # Плюс случайно от 0 до jitter секунд
+            "error_rate": error_rate,          # Доля ответов 503
+            "hang_rate": hang_rate,            # Доля запросов, ответ на которые придёт через HANG_SEC
+            "ws_frame_delay": ws_frame_delay,  # Секунды перед каждым кадром сокета состояния
+            "ws_drop_after": ws_drop_after,    # Закрыть сокет состояния через столько секунд (None - не закрывать)
+        }
+        self.track_interval = track_interval
+        self.random = random.Random(seed)
+        self.requests = {}  # адрес -> число запросов
+
+        self.weather = load_recording("weather.json")
+        self.account_status = load_recording("account_status.json")
+        self.tracks = load_recording("tracks.json")
+        self.ynison_state = load_recording("ynison_state.json")
+        self.track_ids = list(self.tracks)
+        self.state_sockets = set()
+
+        self.runner = None
+        self.loop = None
+        self.track_task = None
+
+    # --- Запуск ---
+    async def start(self):
+        app = web.Application(middlewares=[self.inject_faults])
+        app.router.add_get("/data/2.5/weather", self.handle_weather)
+        app.router.add_get("/account/status", self.handle_account_status)
+        app.router.add_post("/tracks", self.handle_tracks)
+        app.router.add_get("/redirector.YnisonRedirectService/GetRedirectToYnison", self.handle_ynison_redirect)
+        app.router.add_get("/ynison_state.YnisonStateService/PutYnisonState", self.handle_ynison_state)
+        app.router.add_get("/_stats", self.handle_stats)
+
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = self.runner.addresses[0][1]
+        self.loop = asyncio.get_running_loop()
+        if self.track_interval:
+            self.track_task = asyncio.create_task(self.cycle_tracks())
+        return self
+
+    async def stop(self):
+        if self.track_task is not None:
+            self.track_task.cancel()
+        for ws in list(self.state_sockets):
+            await ws.close()
+        await self.runner.cleanup()
+
+    def start_in_thread(self):
+        """Запускает серверы в своём потоке и цикле событий, чтобы они не мешали замерам в вызывающем цикле."""
+        started = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, name="fake-servers", daemon=True).start()
+        started.wait()
+        return self
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def settings(self):
+        """Настройки монитора (имена из monitor_core/config.py), направляющие его на эти серверы."""
+        return {
+            "OPENWEATHER_BASE_URL": self.url,
+            "OPENWEATHER_API_KEY": "fake-key",
+            "CITY_ID": FAKE_CITY_ID,
+            "YANDEX_MUSIC_API_URL": self.url,
+            "YANDEX_MUSIC_TOKEN": FAKE_TOKEN,
+            "YNISON_REDIRECTOR_URL": f"ws://{self.host}:{self.port}",
+        }
+
+    # --- Неисправности ---
+    @web.middleware
+    async def inject_faults(self, request, handler):
+        self.requests[request.path] = self.requests.get(request.path, 0) + 1
+        if request.path == "/_stats":
+            return await handler(request)
+        faults = self.faults
+        delay = faults["latency"] + self.random.uniform(0, faults["jitter"])
+        if self.random.random() < faults["hang_rate"]:
+            delay = HANG_SEC
+        if delay:
+            await asyncio.sleep(delay)
+        if self.random.random() < faults["error_rate"]:
+            return web.json_response({"error": "fake outage"}, status=503)
+        return await handler(request)
+
+    # --- HTTP ---
+    async def handle_weather(self, request):
+        if request.query.get("appid") is None:
+            return web.json_response({"cod": 401, "message": "Invalid API key."}, status=401)
+        return web.json_response(self.weather)
+
+    async def handle_account_status(self, request):
+        if request.headers.get("Authorization") != f"OAuth {FAKE_TOKEN}":
+            return web.json_response({"error": {"name": "session-expired"}}, status=401)
+        return web.json_response(self.account_status)
+
+    async def handle_tracks(self, request):
+        form = await request.post()
+        ids = str(form.get("track-ids", "")).split(",")
+        result = [self.tracks.get(track_id) or self.unknown_track(track_id) for track_id in ids if track_id]
+        return web.json_response({"invocationInfo": {"hostname": "fake", "req-id": uuid.uuid4().hex}, "result": result})
+
+    def unknown_track(self, track_id):
+        return {"id": track_id, "realId": track_id, "title": f"Track {track_id}", "available": True,
+                "artists": [{"id": 0, "name": "Unknown Artist"}], "albums": []}
+
+    async def handle_stats(self, request):
+        return web.json_response({"requests": self.requests, "faults": self.faults,
+                                  "state_sockets": len(self.state_sockets)})
+
+    # --- Ynison ---
+    async def handle_ynison_redirect(self, request):
+        ws = web.WebSocketResponse(protocols=YNISON_PROTOCOLS)
+        await ws.prepare(request)
+        await ws.send_str(json.dumps({
+            "host": f"{self.host}:{self.port}",
+            "redirect_ticket": uuid.uuid4().hex,
+            "session_id": str(self.random.getrandbits(63)),
+            "keep_alive_params": {"keep_alive_time_seconds": 30, "keep_alive_timeout_seconds": 10},
+        }))
+        await ws.close()
+        return ws
+
+    async def handle_ynison_state(self, request):
+        ws = web.WebSocketResponse(protocols=YNISON_PROTOCOLS)
+        await ws.prepare(request)
+        self.state_sockets.add(ws)
+        drop_timer = None
+        if self.faults["ws_drop_after"] is not None:
+            drop_timer = asyncio.get_running_loop().call_later(
+                self.faults["ws_drop_after"], lambda: asyncio.ensure_future(ws.close()))
+        try:
+            await ws.receive()  # Полное состояние устройства от клиента
+            await self.send_state(ws)
+            async for _ in ws:
+                pass  # Клиент больше ничего не шлёт, кроме ping (на них aiohttp отвечает сам)
+        finally:
+            self.state_sockets.discard(ws)
+            if drop_timer is not None:
+                drop_timer.cancel()
+        return ws
+
+    async def send_state(self, ws):
+        if self.faults["ws_frame_delay"]:
+            await asyncio.sleep(self.faults["ws_frame_delay"])
+        if not ws.closed:
+            await ws.send_str(json.dumps(self.ynison_state))
+
+    async def broadcast_state(self):
+        await asyncio.gather(*(self.send_state(ws) for ws in list(self.state_sockets)), return_exceptions=True)
+
+    # --- Смена треков ---
+    def set_track(self, playable_id, paused=False):
+        state = copy.deepcopy(self.ynison_state)
+        queue = state["player_state"]["player_queue"]
+        queue["playable_list"][0]["playable_id"] = str(playable_id)
+        queue["current_playable_index"] = 0
+        state["player_state"]["status"]["paused"] = paused
+        state["player_state"]["status"]["progress_ms"] = 0
+        self.ynison_state = state
+
+    def push_track(self, playable_id, paused=False):
+        """Переключает трек (или паузу) и рассылает состояние всем подключённым клиентам; можно звать из любого потока."""
+        self.set_track(playable_id, paused)
+        asyncio.run_coroutine_threadsafe(self.broadcast_state(), self.loop)
+
+    async def cycle_tracks(self):
+        """Треки из recordings/tracks.json по кругу, каждые track_interval секунд."""
+        index = 0
+        while True:
+            await asyncio.sleep(self.track_interval)
+            index = (index + 1) % len(self.track_ids)
+            self.set_track(self.track_ids[index])
+            await self.broadcast_state()
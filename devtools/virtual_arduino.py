@@ -0,0 +1,479 @@
+"""
+Виртуальный Arduino: эмулятор скетча arduino_monitor.ino на псевдотерминале (только Linux).
+
+Эмулятор держит ведущую сторону пары pty (os.openpty), а скрипт ПК открывает ведомую
+как обычный последовательный порт (ARDUINO_PORT = путь, который печатает эмулятор).
+Повторяется логика скетча: разбор кадров по байту, строки экрана с MSG_ACK, бегущая
+строка, ячейки CGRAM, согласование скорости с возвратом на 9600, CONNECTION_TIMEOUT
+с надписью "Connection lost!" и кнопки A/B с антидребезгом. Байты от ПК принимаются
+не быстрее, чем их пропустил бы UART на текущей скорости (10 бит на байт), поэтому
+загрузка линии и очередь записи на стороне ПК ведут себя как с настоящей платой.
+Если скорость порта на стороне ПК не совпадает со скоростью скетча, байты теряются.
+
+    python -m devtools.virtual_arduino                           # порт и LCD в консоли; a/b + Enter - кнопки
+    python -m devtools.virtual_arduino --run-host --presses 20   # скрипт ПК в том же процессе, замер задержек
+    python -m devtools.virtual_arduino --run-host --fake-servers # то же с погодой и музыкой без интернета
+
+Из кода:
+
+    arduino = VirtualArduino()
+    arduino.start()
+    ...  # запустить скрипт ПК на arduino.port
+    arduino.wait_for_screen(lambda lines: lines[0].strip())
+    latency = arduino.press_and_measure("B")   # секунды от нажатия до изменения LCD
+    print(arduino.screen(), arduino.stats())
+"""
+
+import argparse
+import os
+import statistics
+import termios
+import threading
+import time
+import tty
+
+from monitor_core import glyphs, protocol
+
+# --- Константы скетча (должны совпадать с arduino_monitor.ino) ---
+LCD_COLS = 16
+LCD_ROWS = 2
+BASE_BAUD_RATE = 9600
+SUPPORTED_BAUD_RATES = (115200, 57600, 38400, 19200)
+BAUD_CONFIRM_TIMEOUT_MS = 1500
+CONNECTION_TIMEOUT_MS = 4000
+DEBOUNCE_DELAY_MS = 50
+MAX_FRAME_PAYLOAD = 64
+
+# --- Эмуляция ---
+LOOP_PERIOD_SEC = 0.001  # Один проход loop()
+BITS_PER_BYTE = 10       # 8N1: стартовый бит, 8 бит данных, стоповый бит
+BUTTONS = {"A": protocol.BUTTON_A, "B": protocol.BUTTON_B}
+GLYPH_LETTERS = {bytes(bitmap): letter for letter, bitmap in glyphs.GLYPHS.items()}
+ROM_SYMBOL_TEXT = {code: symbol for symbol, code in glyphs.ROM_SYMBOLS.items()}
+
+
+class VirtualArduino:
+    """Скетч arduino_monitor.ino на ведущей стороне pty; loop() крутится в отдельном потоке."""
+
+    def __init__(self):
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)  # Без эха: иначе наши же кадры вернулись бы к нам
+        os.set_blocking(self.master_fd, False)
+        self.port = os.ttyname(self.slave_fd)
+
+        self.lock = threading.Lock()
+        self.screen_changed = threading.Condition(self.lock)
+        self.thread = None
+        self.running = False
+        self.started_at = time.monotonic()
+        self.pending_presses = []  # (время срабатывания антидребезга, кнопка)
+        self.stats_counters = {"bytes_in": 0, "bytes_out": 0, "frames_in": 0, "frames_out": 0,
+                               "bytes_lost": 0, "connection_lost": 0}
+        self.frames_by_type = {}
+        self.screen_version = 0  # Растёт при каждом изменении LCD
+        self.reset()
+
+    # --- Время и порт ---
+    def millis(self):
+        return int((time.monotonic() - self.started_at) * 1000)
+
+    def host_baud_matches(self):
+        """Совпадает ли скорость, выставленная ПК на своей стороне pty, со скоростью скетча."""
+        speed = termios.tcgetattr(self.slave_fd)[5]
+        return speed == getattr(termios, f"B{self.current_baud_rate}", None)
+
+    def send_frame(self, msg_type, payload=b""):
+        frame = protocol.encode_frame(msg_type, bytes(payload))
+        if not self.host_baud_matches():
+            self.stats_counters["bytes_lost"] += len(frame)
+            return
+        try:
+            os.write(self.master_fd, frame)
+        except BlockingIOError:  # ПК не читает порт: UART тоже просто отправил бы байты в никуда
+            self.stats_counters["bytes_lost"] += len(frame)
+            return
+        self.stats_counters["bytes_out"] += len(frame)
+        self.stats_counters["frames_out"] += 1
+
+    # --- LCD ---
+    def lcd_clear(self):
+        self.framebuffer = [bytearray(b" " * LCD_COLS) for _ in range(LCD_ROWS)]
+        self.screen_version += 1
+        self.screen_changed.notify_all()
+
+    def lcd_print(self, row, data):
+        if isinstance(data, str):
+            data = data.encode("ascii", errors="replace")
+        line = self.framebuffer[row]
+        before = bytes(line)
+        line[:len(data[:LCD_COLS])] = data[:LCD_COLS]
+        if bytes(line) != before:
+            self.screen_version += 1
+            self.screen_changed.notify_all()
+
+    def screen(self):
+        """Строки LCD как текст; ячейки CGRAM показываются загруженными в них буквами."""
+        with self.lock:
+            return [self.decode_lcd_line(line) for line in self.framebuffer]
+
+    def decode_lcd_line(self, line):
+        text = []
+        for code in line:
+            if code < 16:
+                letter = GLYPH_LETTERS.get(self.cgram[code & 0x07])
+                text.append(letter or "?")
+            else:
+                text.append(ROM_SYMBOL_TEXT.get(code, chr(code)))
+        return "".join(text)
+
+    # --- Состояние скетча ---
+    def reset(self):
+        """Перезагрузка Arduino: всё состояние скетча с нуля, как после setup()."""
+        with self.lock:
+            self.cgram = [b"\x00" * 8] * 8
+            self.framebuffer = [bytearray(b" " * LCD_COLS) for _ in range(LCD_ROWS)]
+            self.lcd_print(0, "Waiting for PC...")
+            self.current_screen_lines = [b"", b""]
+            self.current_baud_rate = BASE_BAUD_RATE
+            self.baud_pending_confirm = False
+            self.baud_switch_time = 0
+            self.marquee_active = False
+            self.marquee_row = 1
+            self.marquee_text = b""
+            self.marquee_step_ms = 200
+            self.marquee_offset = 0
+            self.marquee_last_step_time = 0
+            self.rx_state = 0
+            self.rx_budget = 0.0
+            self.last_rx_time = time.monotonic()
+            self.last_data_received_time = self.millis()
+            self.connection_active = False
+            self.send_frame(protocol.MSG_HELLO, protocol.HELLO_BANNER)
+
+    def switch_baud_rate(self, rate):
+        self.current_baud_rate = rate
+        self.rx_state = 0
+
+    def set_screen_line(self, row, text):
+        self.current_screen_lines[row] = text
+        self.lcd_print(row, text)
+
+    def redraw_screen(self):
+        self.lcd_clear()
+        if self.current_screen_lines[0]:
+            self.lcd_print(0, self.current_screen_lines[0])
+            self.lcd_print(1, self.current_screen_lines[1])
+        else:
+            self.lcd_print(0, "Waiting for data")
+
+    def show_marquee_window(self):
+        text = self.marquee_text
+        window = text[self.marquee_offset:] + text[:self.marquee_offset]
+        self.set_screen_line(self.marquee_row, window.ljust(LCD_COLS)[:LCD_COLS])
+
+    def update_marquee(self):
+        if not self.marquee_active or not self.connection_active or len(self.marquee_text) <= LCD_COLS:
+            return
+        if self.millis() - self.marquee_last_step_time < self.marquee_step_ms:
+            return
+        self.marquee_last_step_time = self.millis()
+        self.marquee_offset = (self.marquee_offset + 1) % len(self.marquee_text)
+        self.show_marquee_window()
+
+    def handle_frame(self, msg_type, payload):
+        self.stats_counters["frames_in"] += 1
+        self.frames_by_type[msg_type] = self.frames_by_type.get(msg_type, 0) + 1
+        if msg_type == protocol.MSG_IDLE_LINE and len(payload) >= 1:
+            row = payload[0] & 1
+            if self.marquee_active and row == self.marquee_row:
+                self.marquee_active = False
+            self.set_screen_line(row, payload[1:])
+            self.send_frame(protocol.MSG_ACK, bytes((payload[0], self.rx_crc)))
+        elif msg_type == protocol.MSG_MARQUEE and len(payload) >= 3:
+            self.marquee_row = payload[0] & 1
+            self.marquee_step_ms = payload[1] | (payload[2] << 8)
+            self.marquee_text = payload[3:]
+            self.marquee_offset = 0
+            self.marquee_last_step_time = self.millis()
+            self.marquee_active = True
+            self.show_marquee_window()
+            self.send_frame(protocol.MSG_ACK, bytes((payload[0], self.rx_crc)))
+        elif msg_type == protocol.MSG_GLYPH and len(payload) == 9:
+            self.cgram[payload[0] & 0x07] = bytes(payload[1:])
+            self.screen_version += 1  # Уже выведенные коды ячейки меняют вид сразу
+            self.screen_changed.notify_all()
+        elif msg_type == protocol.MSG_BAUD_PROPOSE and len(payload) == 4:
+            rate = protocol.decode_baud(payload)
+            supported = rate in SUPPORTED_BAUD_RATES
+            self.send_frame(protocol.MSG_BAUD_ACCEPT, payload if supported else bytes(4))
+            if supported:
+                self.switch_baud_rate(rate)
+                self.baud_pending_confirm = True
+                self.baud_switch_time = self.millis()
+        elif msg_type == protocol.MSG_BAUD_TEST:
+            self.send_frame(protocol.MSG_BAUD_TEST, payload)
+        elif msg_type == protocol.MSG_BAUD_CONFIRM:
+            self.baud_pending_confirm = False
+        elif msg_type == protocol.MSG_HELLO_REQUEST:
+            self.send_frame(protocol.MSG_HELLO, protocol.HELLO_BANNER)
+
+    def feed_frame_byte(self, b):
+        """feedFrameByte() скетча. Возвращает True, если собран и обработан корректный кадр."""
+        state = self.rx_state
+        if state == 0:
+            if b == protocol.FRAME_SOF:
+                self.rx_state = 1
+        elif state == 1:
+            if b == protocol.PROTOCOL_VERSION:
+                self.rx_crc = protocol.crc8(bytes((b,)))
+                self.rx_state = 2
+            elif b != protocol.FRAME_SOF:
+                self.rx_state = 0
+        elif state == 2:
+            self.rx_type = b
+            self.rx_crc = protocol.crc8(bytes((b,)), self.rx_crc)
+            self.rx_state = 3
+        elif state == 3:
+            self.rx_length = b
+            self.rx_crc = protocol.crc8(bytes((b,)), self.rx_crc)
+            self.rx_payload = bytearray()
+            if b > MAX_FRAME_PAYLOAD:
+                self.rx_state = 0
+            else:
+                self.rx_state = 5 if b == 0 else 4
+        elif state == 4:
+            self.rx_payload.append(b)
+            self.rx_crc = protocol.crc8(bytes((b,)), self.rx_crc)
+            if len(self.rx_payload) == self.rx_length:
+                self.rx_state = 5
+        elif state == 5:
+            self.rx_state = 0
+            if b == self.rx_crc:
+                self.handle_frame(self.rx_type, bytes(self.rx_payload))
+                return True
+        return False
+
+    def read_serial(self):
+        """Байты, которые UART успел принять с прошлого прохода loop() на текущей скорости."""
+        now = time.monotonic()
+        self.rx_budget += (now - self.last_rx_time) * self.current_baud_rate / BITS_PER_BYTE
+        self.last_rx_time = now
+        limit = int(self.rx_budget)
+        if limit <= 0:
+            return b""
+        try:
+            data = os.read(self.master_fd, limit)
+        except (BlockingIOError, OSError):  # OSError (EIO) - ПК ещё не открыл порт или уже закрыл его
+            data = b""
+        self.rx_budget = self.rx_budget - len(data) if data else min(self.rx_budget, 1.0)  # Линия простаивала
+        if data and not self.host_baud_matches():
+            self.stats_counters["bytes_lost"] += len(data)
+            return b""
+        self.stats_counters["bytes_in"] += len(data)
+        return data
+
+    def loop_once(self):
+        """Один проход loop() скетча."""
+        with self.lock:
+            now = self.millis()
+            while self.pending_presses and self.pending_presses[0][0] <= now:
+                _, button = self.pending_presses.pop(0)
+                self.send_frame(protocol.MSG_BUTTON, bytes((button,)))
+                self.last_press_time = time.monotonic()
+
+            frame_received = False
+            for b in self.read_serial():
+                if self.feed_frame_byte(b):
+                    frame_received = True
+
+            self.update_marquee()
+
+            if self.baud_pending_confirm and self.millis() - self.baud_switch_time > BAUD_CONFIRM_TIMEOUT_MS:
+                self.baud_pending_confirm = False
+                self.switch_baud_rate(BASE_BAUD_RATE)
+
+            if frame_received:
+                self.last_data_received_time = self.millis()
+                if not self.connection_active:
+                    self.connection_active = True
+                    self.redraw_screen()
+            elif self.millis() - self.last_data_received_time > CONNECTION_TIMEOUT_MS:
+                if self.current_baud_rate != BASE_BAUD_RATE:
+                    self.switch_baud_rate(BASE_BAUD_RATE)
+                if self.connection_active or self.last_data_received_time == 0:
+                    self.lcd_clear()
+                    self.lcd_print(0, "Connection lost!")
+                    self.lcd_print(1, "Check PC.")
+                    self.connection_active = False
+                    self.stats_counters["connection_lost"] += 1
+
+    # --- Запуск ---
+    def run(self):
+        while self.running:
+            self.loop_once()
+            time.sleep(LOOP_PERIOD_SEC)
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="virtual-arduino", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+        os.close(self.master_fd)
+        os.close(self.slave_fd)
+
+    # --- Сценарии ---
+    def press(self, button):
+        """Нажимает кнопку "A" или "B"; скетч сообщит о ней через DEBOUNCE_DELAY, как с настоящей кнопкой."""
+        with self.lock:
+            self.pending_presses.append((self.millis() + DEBOUNCE_DELAY_MS, BUTTONS[button]))
+
+    def wait_for_screen(self, predicate, timeout=10):
+        """Ждёт, пока predicate(строки LCD) станет истинным. Возвращает строки или None по таймауту."""
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            while True:
+                lines = [self.decode_lcd_line(line) for line in self.framebuffer]
+                if predicate(lines):
+                    return lines
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return None
+                self.screen_changed.wait(left)
+
+    def press_and_measure(self, button, timeout=5):
+        """
+        Нажимает кнопку и возвращает секунды от отправки MSG_BUTTON до первого изменения LCD
+        (None, если экран не изменился за timeout). Бегущая строка на время замера должна стоять,
+        иначе её шаг будет принят за ответ.
+        """
+        with self.lock:
+            self.last_press_time = None
+            self.pending_presses.append((self.millis() + DEBOUNCE_DELAY_MS, BUTTONS[button]))
+            deadline = time.monotonic() + timeout
+            while self.last_press_time is None:
+                self.screen_changed.wait(LOOP_PERIOD_SEC)
+            pressed, version = self.last_press_time, self.screen_version
+            while self.screen_version == version:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return None
+                self.screen_changed.wait(left)
+            return time.monotonic() - pressed
+
+    def stats(self):
+        """Счётчики линии; utilization - доля пропускной способности UART, занятая байтами от ПК."""
+        with self.lock:
+            elapsed = time.monotonic() - self.started_at
+            capacity = self.current_baud_rate / BITS_PER_BYTE * elapsed
+            return dict(self.stats_counters,
+                        baud_rate=self.current_baud_rate,
+                        connected=self.connection_active,
+                        frames_by_type={hex(t): n for t, n in sorted(self.frames_by_type.items())},
+                        bytes_in_per_sec=self.stats_counters["bytes_in"] / elapsed,
+                        utilization=self.stats_counters["bytes_in"] / capacity if capacity else 0.0)
+
+
+# --- Консоль ---
+def interactive(arduino):
+    """LCD в консоли при каждом изменении; a/b + Enter - кнопки, r - перезагрузка, q - выход."""
+    def show_screen():
+        version = None
+        while arduino.running:
+            with arduino.lock:
+                if arduino.screen_version == version:
+                    arduino.screen_changed.wait(0.5)
+                    continue
+                version = arduino.screen_version
+            print("+" + "-" * LCD_COLS + "+")
+            for line in arduino.screen():
+                print(f"|{line}|")
+            print("+" + "-" * LCD_COLS + "+")
+
+    threading.Thread(target=show_screen, daemon=True).start()
+    while True:
+        command = input().strip().lower()
+        if command in ("a", "b"):
+            arduino.press(command.upper())
+        elif command == "r":
+            arduino.reset()
+        elif command == "s":
+            print(arduino.stats())
+        elif command == "q":
+            return
+
+
+def measure(arduino, presses):
+    """Чередует B (карточки) и A (назад к часам) и печатает задержку кнопка -> LCD и загрузку линии."""
+    print("Waiting for the host to draw the first frame...")
+    if arduino.wait_for_screen(lambda lines: arduino.connection_active, timeout=30) is None:
+        print("The host did not connect")
+        return
+    latencies = []
+    for i in range(presses):
+        latency = arduino.press_and_measure("B" if i % 2 == 0 else "A")
+        if latency is None:
+            print(f"Press {i + 1}: no change on the LCD")
+        else:
+            latencies.append(latency)
+        time.sleep(0.3)
+    if latencies:
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"Button -> LCD latency over {len(latencies)} presses: median {statistics.median(latencies) * 1000:.1f} ms, "
+              f"p95 {p95 * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+    stats = arduino.stats()
+    print(f"Link: {stats['baud_rate']} baud, {stats['bytes_in_per_sec']:.0f} B/s from the host "
+          f"({stats['utilization']:.1%} of the line), {stats['bytes_lost']} bytes lost, "
+          f"frames {stats['frames_by_type']}")
+
+
+def run_host_in_background(port, fake_servers=False):
+    """
+    Скрипт ПК в отдельном потоке этого же процесса: без Яндекс.Музыки, а с fake_servers -
+    с погодой и музыкой от devtools.fake_servers вместо интернета.
+    """
+    import asyncio
+    from monitor_core import app, config
+
+    config.configure(ARDUINO_PORT=port, YANDEX_MUSIC_TOKEN="", METRICS_PORT=None)
+    if fake_servers:
+        from devtools.fake_servers import FakeServers
+
+        servers = FakeServers(track_interval=10).start_in_thread()
+        config.configure(**servers.settings())
+        print(f"Fake weather and music servers on {servers.url}")
+    threading.Thread(target=lambda: asyncio.run(app.main()), name="host", daemon=True).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m devtools.virtual_arduino",
+                                     description="Emulate the arduino_monitor.ino sketch on a pseudo-terminal")
+    parser.add_argument("--run-host", action="store_true", help="run the PC side in this process on the emulated port")
+    parser.add_argument("--presses", type=int, default=0, metavar="N",
+                        help="press B/A N times, then print button-to-LCD latency and link utilization")
+    parser.add_argument("--fake-servers", action="store_true",
+                        help="with --run-host, serve weather and music from devtools.fake_servers")
+    args = parser.parse_args()
+
+    arduino = VirtualArduino().start()
+    print(f"Virtual Arduino on {arduino.port} (set ARDUINO_PORT to this path)")
+    if args.run_host:
+        run_host_in_background(arduino.port, args.fake_servers)
+    try:
+        if args.presses:
+            measure(arduino, args.presses)
+        else:
+            interactive(arduino)
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        arduino.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Общее ядро монитора для Linux и Windows; точки входа - arduino_monitor.py и arduino_monitor_win.py."""
@@ -0,0 +1,144 @@
+"""
+Сборка монитора: обработка кадров от Arduino, цикл отправки экрана и запуск всех задач под надзором.
+Точки входа (arduino_monitor.py, arduino_monitor_win.py) только задают настройки и вызывают run().
+"""
+
+import asyncio
+import time
+
+from . import config, display, history, httpclient, metrics, protocol, scheduler, transport
+from .sources import music, network, system, weather
+from .supervisor import supervise
+
+
+# --- Обработка кадров от Arduino ---
+def handle_arduino_frame(msg_type, payload, current_time):
+    if transport.resolve_waiter(msg_type, payload):
+        return
+    if msg_type == protocol.MSG_ACK and payload:
+        display.handle_idle_ack(payload)
+        return
+    if msg_type == protocol.MSG_HELLO:
+        print("Arduino restarted")
+        display.invalidate_idle_frame()  # Экран и CGRAM после перезагрузки пусты
+        return
+    if msg_type == protocol.MSG_BUTTON and payload:
+        print(f"Button {protocol.BUTTON_NAMES.get(payload[0], payload[0])} pressed")
+        scheduler.handle_button(payload[0], current_time)
+        return
+    # Дальше - запросы скетчей, которые сами переключали экраны
+    if msg_type != protocol.MSG_COMMAND or not payload:
+        return
+
+    command = payload[0]
+    print(f"Received command from Arduino: '{protocol.COMMAND_NAMES.get(command, command)}'")
+
+    if command == protocol.CMD_REQ_WEATHER or command == protocol.CMD_REQ_WEATHER_FORCE:
+        weather.request_weather_update()
+        display.invalidate_idle_frame()  # Скетч стёр экран надписью "Updating weather"
+        print(f"Weather update requested by Arduino. Data will be sent in next IDLE pulse.")
+
+    elif command == protocol.CMD_REQ_SYSTEM_STATS:
+        _, (line1, line2), frame = scheduler.cached_card("system_stats", current_time)
+        transport.queue_serial_frame("card", frame)
+        transport.response_started["card"] = current_time
+        display.note_serial_write(current_time)
+        print(f"Sent: '{line1}', '{line2}' (System Stats)")
+
+    elif command == protocol.CMD_REQ_NETWORK_INFO:
+        _, (line1, line2), frame = scheduler.cached_card("network_info", current_time)
+        transport.queue_serial_frame("card", frame)
+        transport.response_started["card"] = current_time
+        display.note_serial_write(current_time)
+        print(f"Sent: '{line1}', '{line2}' (Network Info)")
+
+
+def feed_serial_bytes(data):
+    current_time = time.time()
+    metrics.count("serial_bytes_in", len(data))
+    with metrics.timer("serial_read"):
+        for msg_type, payload in transport.frame_decoder.feed(data):
+            metrics.count("serial_frames_in")
+            transport.note_frame_received(current_time)
+            handle_arduino_frame(msg_type, payload, current_time)
+
+
+# --- Связь с Arduino ---
+async def arduino_communication_task():
+    await transport.attach_arduino()
+    transport.reset()
+    display.invalidate_idle_frame()
+
+    loop = asyncio.get_running_loop()
+    serial_error = loop.create_future()
+
+    def on_serial_error(e):
+        if not serial_error.done():
+            serial_error.set_exception(e)
+
+    stop_reader = transport.start_reader(loop, feed_serial_bytes, on_serial_error)
+    writer_task = asyncio.create_task(transport.serial_writer_loop())
+    watchdog_task = None
+    try:
+        # Часы уходят на базовой скорости ещё до согласования: первый кадр не ждёт его таймаутов
+        current_time = time.time()
+        display.send_idle_frame(scheduler.build_screen_frame(current_time), current_time)
+        await transport.negotiate_baud_rate()
+        watchdog_task = asyncio.create_task(transport.link_watchdog())
+        while not serial_error.done() and not writer_task.done() and not watchdog_task.done():
+            current_time = time.time()
+            scheduler.screen_changed.clear()
+            display.send_idle_frame(scheduler.build_screen_frame(current_time), current_time)
+
+            # Просыпаемся по тику, ровно к смене карточки или сразу после нажатия кнопки
+            timeout = config.IDLE_DATA_SEND_INTERVAL_SEC
+            card_left = scheduler.seconds_to_next_card(current_time)
+            if card_left is not None:
+                timeout = min(timeout, card_left)
+            wake = asyncio.create_task(scheduler.screen_changed.wait())
+            await asyncio.wait({serial_error, writer_task, watchdog_task, wake},
+                               timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            wake.cancel()
+        # Порт пропал, запись упала или Arduino вернулся на базовую скорость: исключение уходит
+        # в supervise(), он переоткроет порт
+        if serial_error.done():
+            serial_error.result()
+        if watchdog_task.done():
+            watchdog_task.result()
+        writer_task.result()
+    finally:
+        writer_task.cancel()
+        if watchdog_task is not None:
+            watchdog_task.cancel()
+        stop_reader()
+        transport.close_serial_port()
+
+
+# --- Запуск ---
+async def main():
+    history.load_history()
+    try:
+        await asyncio.gather(
+            supervise("system_stats", system.system_stats_sampler_task),
+            supervise("history_save", history.history_save_task),
+            supervise("network_info", network.network_info_update_task),
+            supervise("card_cache", scheduler.card_cache_refresh_task),
+            supervise("weather", weather.weather_update_task),
+            supervise("music", music.music_status_update_task),
+            supervise("arduino", arduino_communication_task),
+            supervise("metrics_sampler", metrics.metrics_sampler_task),
+            supervise("metrics_server", metrics.metrics_server_task)
+        )
+    finally:
+        await httpclient.close_http_session()
+
+
+def run():
+    """Запускает монитор до Ctrl+C. Настройки должны быть уже заданы через config.configure()."""
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nProgram terminated by user.")
+    finally:
+        transport.close_serial_port()
+        history.save_history()
@@ -0,0 +1,61 @@
+"""
+Настройки монитора.
+
+Здесь значения по умолчанию. Точка входа переопределяет их через configure():
+arduino_monitor.py - своими константами, arduino_monitor_win.py - из config.json
+(ключи config.json - те же имена в нижнем регистре). Остальные модули читают
+настройки как config.ИМЯ в момент использования, поэтому видят уже переопределённые значения.
+"""
+
+from . import transliteration
+
+# --- Подключение к Arduino ---
+ARDUINO_PORT = "auto"  # "auto" - найти среди портов Arduino и USB-UART, "auto-all" - среди всех USB-портов, или явный порт ("/dev/ttyACM0", "COM3")
+BAUD_RATE = 9600       # Начальная скорость, должна совпадать с BASE_BAUD_RATE в скетче!
+NEGOTIATED_BAUD_RATES = [230400, 115200, 57600]  # Кандидаты для согласования, от быстрой к медленной
+
+# --- OpenWeatherMap ---
+OPENWEATHER_API_KEY = ""
+CITY_ID = ""
+WEATHER_UPDATE_INTERVAL_MINUTES = 15
+OPENWEATHER_BASE_URL = "http://api.openweathermap.org"  # Адреса сервисов можно заменить подставными (devtools/fake_servers)
+
+# --- Яндекс.Музыка ---
+YANDEX_MUSIC_TOKEN = ""  # Пустой токен - музыка отключена
+MUSIC_SCROLL_SPEED_SEC = 0.2
+YANDEX_MUSIC_API_URL = "https://api.music.yandex.net"
+YNISON_REDIRECTOR_URL = "wss://ynison.music.yandex.ru"  # Сокет состояния открывается по той же схеме (ws/wss)
+
+# --- Экран ---
+IDLE_DATA_SEND_INTERVAL_SEC = 0.5
+CARD_DISPLAY_DURATION_SEC = 5     # Сколько показывается каждая карточка статистики
+CARD_CACHE_MAX_STALENESS_SEC = 2  # Старше этого карточка пересобирается прямо при запросе; обновляется вдвое чаще
+TRANSLITERATION_LANGUAGES = ["ru", "uk", "be"]
+
+# --- Системные метрики и сеть ---
+PLATFORM = "auto"      # "auto", "linux" или "windows" - чем опрашивать сеть и диск (см. platforms/)
+DISK_PATH = None       # None - корень системного диска платформы
+SYSTEM_STATS_SAMPLE_INTERVAL_SEC = 1
+NETWORK_INTERFACE = "wlan0"     # Только для Linux: интерфейс Wi-Fi
+NETWORK_CHECK_INTERVAL_SEC = 2  # Как часто сверять адреса интерфейсов (без запуска nmcli/netsh)
+HISTORY_FILE = None             # Файл истории CPU/RAM/диска (например "history.bin"); None - история только в памяти
+HISTORY_SAVE_INTERVAL_SEC = 300
+
+# --- Метрики ---
+METRICS_HOST = "127.0.0.1"  # Только локально: метрики не должны быть видны из сети
+METRICS_PORT = 9105         # None - сервер метрик не запускается
+
+
+def configure(**settings):
+    """Переопределяет настройки; неизвестные имена пропускаются с предупреждением."""
+    for name, value in settings.items():
+        if not name.isupper() or name not in globals():
+            print(f"WARNING: Unknown setting '{name}' ignored")
+            continue
+        globals()[name] = value
+    transliteration.set_languages(TRANSLITERATION_LANGUAGES)
+
+
+def from_json(config):
+    """Ключи config.json ("baud_rate") -> имена настроек ("BAUD_RATE")."""
+    return {key.upper(): value for key, value in config.items()}
@@ -0,0 +1,110 @@
+"""
+Что сейчас на LCD: разностная отправка строк экрана с подтверждениями (MSG_ACK),
+символы CGRAM для кириллицы и замер времени до первого кадра.
+"""
+
+import asyncio
+import time
+
+import psutil
+
+from . import config, glyphs, protocol, transport
+
+# --- Разностная отправка кадров: шлём только изменившиеся строки ---
+IDLE_KEEPALIVE_INTERVAL_SEC = 1  # Должно быть заметно меньше CONNECTION_TIMEOUT в скетче
+IDLE_ACK_TIMEOUT_SEC = 1
+MUSIC_SCROLL_GAP = " " * 9       # Пробелы между концом и началом бегущей строки (добавляются при отправке)
+idle_frame_acked = [None, None]    # Строки, которые Arduino подтвердил (MSG_ACK)
+idle_frame_pending = [None, None]  # (текст, время отправки, CRC8 кадра) ещё не подтверждённых строк
+last_serial_write_time = 0
+glyph_manager = glyphs.GlyphManager()  # Кириллица в ячейках CGRAM дисплея
+
+# --- Быстрый старт: сначала часы на LCD, потом тяжёлые модули и клиент Яндекс.Музыки ---
+STARTUP_DEFER_MAX_SEC = 5  # Погода и музыка ждут первого кадра, но не дольше этого (Arduino может быть не подключён)
+first_frame_shown = asyncio.Event()
+
+
+def invalidate_idle_frame():
+    """Забываем, что показано на экране (Arduino перезапустился или очистил LCD)."""
+    for row in range(len(idle_frame_acked)):
+        idle_frame_acked[row] = None
+        idle_frame_pending[row] = None
+    glyph_manager.reset()
+
+
+def note_serial_write(current_time):
+    """В порт ушёл кадр мимо send_idle_frame(): keepalive пока не нужен."""
+    global last_serial_write_time
+    last_serial_write_time = current_time
+
+
+def render_idle_frame(lines):
+    """Переводит строки экрана в коды LCD; недостающие символы CGRAM ставятся в очередь перед строками."""
+    texts = [line[1] if isinstance(line, tuple) else line for line in lines]
+    rendered, uploads = glyph_manager.render(texts)
+    for slot, bitmap in uploads:
+        transport.queue_serial_frame(("glyph", slot), protocol.encode_glyph(slot, bitmap))
+    return [(line[0], data) if isinstance(line, tuple) else data for line, data in zip(lines, rendered)]
+
+
+def encode_idle_row(row, content):
+    if isinstance(content, tuple):  # ("marquee", текст): Arduino получает строку один раз и сдвигает её сам
+        gap = MUSIC_SCROLL_GAP.encode()
+        return protocol.encode_marquee(row, content[1][:protocol.MARQUEE_MAX_TEXT - len(gap)] + gap,
+                                       config.MUSIC_SCROLL_SPEED_SEC)
+    return protocol.encode_idle_line(row, content)
+
+
+def send_idle_frame(lines, current_time):
+    global last_serial_write_time
+    if any(pending and current_time - pending[1] >= IDLE_ACK_TIMEOUT_SEC for pending in idle_frame_pending):
+        glyph_manager.reset()  # Строка потерялась - могли потеряться и символы CGRAM перед ней
+    lines = render_idle_frame(lines)
+
+    sent = False
+    for row, text in enumerate(lines):
+        if text == idle_frame_acked[row]:
+            continue
+        pending = idle_frame_pending[row]
+        if pending and pending[0] == text and current_time - pending[1] < IDLE_ACK_TIMEOUT_SEC:
+            continue  # Уже отправлено, ждём подтверждения
+        frame = encode_idle_row(row, text)
+        transport.queue_serial_frame(("idle", row), frame)
+        idle_frame_pending[row] = (text, current_time, frame[-1])
+        sent = True
+
+    if sent:
+        last_serial_write_time = current_time
+    elif current_time - last_serial_write_time > IDLE_KEEPALIVE_INTERVAL_SEC:
+        transport.queue_serial_frame("keepalive", protocol.encode_frame(protocol.MSG_KEEPALIVE))
+        last_serial_write_time = current_time
+
+
+def handle_idle_ack(payload):
+    """MSG_ACK: [строка][CRC8 кадра]. Подтверждение прежней версии строки (CRC8 не совпал) не засчитывается."""
+    row = payload[0]
+    if row >= len(idle_frame_pending):
+        return
+    pending = idle_frame_pending[row]
+    if pending and (len(payload) < 2 or payload[1] == pending[2]):  # Старые скетчи не присылают CRC8
+        idle_frame_acked[row] = pending[0]
+        idle_frame_pending[row] = None
+        report_first_frame()
+
+
+# --- Первый кадр ---
+def report_first_frame():
+    """Время от запуска процесса до первой строки, которую Arduino подтвердил."""
+    if first_frame_shown.is_set():
+        return
+    first_frame_shown.set()
+    elapsed = time.time() - psutil.Process().create_time()
+    print(f"First frame on the LCD {elapsed * 1000:.0f} ms after launch")
+
+
+async def wait_for_first_frame():
+    """Откладывает тяжёлую работу до первого кадра на LCD."""
+    try:
+        await asyncio.wait_for(first_frame_shown.wait(), STARTUP_DEFER_MAX_SEC)
+    except asyncio.TimeoutError:
+        pass
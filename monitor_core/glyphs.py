@@ -0,0 +1,147 @@
+"""
+Вывод кириллицы на LCD 1602 (HD44780) без транслитерации.
+
+В знакогенераторе дисплея нет кириллицы, но есть 8 ячеек CGRAM для своих символов.
+Буквы, которые выглядят как латинские (А, В, Е, К, М, Н, О, Р, С, Т, Х...), выводятся
+латиницей, остальные рисуются в CGRAM. Строчные буквы выводятся как уменьшенные
+заглавные, поэтому "Б" и "б" занимают одну ячейку.
+
+Ячейки адресуются кодами 8-15 (зеркало кодов 0-7), чтобы в строках не было байта 0.
+Если кадру нужно больше 8 разных букв, строки, которые не поместились, транслитерируются.
+
+Так же выводятся столбики графиков истории (▁-▇, см. renderer.sparkline): семь высот
+занимают не больше 7 ячеек, а полный столбик █ есть в шрифте дисплея (код 0xFF).
+"""
+
+from . import transliteration
+
+CGRAM_SLOTS = 8
+GLYPH_CODE_BASE = 8
+
+# --- Буквы, совпадающие с латинскими в шрифте HD44780 ---
+LATIN_LOOKALIKES = {
+    'А': 'A', 'В': 'B', 'Е': 'E', 'К': 'K', 'М': 'M', 'Н': 'H', 'О': 'O',
+    'Р': 'P', 'С': 'C', 'Т': 'T', 'Х': 'X', 'І': 'I',
+    'а': 'a', 'в': 'B', 'е': 'e', 'к': 'K', 'м': 'M', 'н': 'H', 'о': 'o',
+    'р': 'p', 'с': 'c', 'т': 'T', 'у': 'y', 'х': 'x', 'і': 'i',
+}
+
+# --- Символы из шрифта HD44780 за пределами ASCII ---
+ROM_SYMBOLS = {'█': 0xFF}
+
+# --- Битмапы 5x8 (строки сверху вниз, младшие 5 бит) ---
+GLYPHS = {
+    'Б': (0x1F, 0x10, 0x10, 0x1E, 0x11, 0x11, 0x1E, 0x00),
+    'Г': (0x1F, 0x10, 0x10, 0x10, 0x10, 0x10, 0x10, 0x00),
+    'Д': (0x06, 0x0A, 0x0A, 0x0A, 0x0A, 0x1F, 0x11, 0x00),
+    'Ж': (0x15, 0x15, 0x0E, 0x04, 0x0E, 0x15, 0x15, 0x00),
+    'З': (0x0E, 0x11, 0x01, 0x06, 0x01, 0x11, 0x0E, 0x00),
+    'И': (0x11, 0x11, 0x13, 0x15, 0x19, 0x11, 0x11, 0x00),
+    'Й': (0x0E, 0x11, 0x13, 0x15, 0x19, 0x11, 0x11, 0x00),
+    'Л': (0x07, 0x09, 0x09, 0x09, 0x09, 0x09, 0x11, 0x00),
+    'П': (0x1F, 0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x00),
+    'У': (0x11, 0x11, 0x11, 0x0F, 0x01, 0x11, 0x0E, 0x00),
+    'Ф': (0x04, 0x0E, 0x15, 0x15, 0x15, 0x0E, 0x04, 0x00),
+    'Ц': (0x12, 0x12, 0x12, 0x12, 0x12, 0x1F, 0x01, 0x00),
+    'Ч': (0x11, 0x11, 0x11, 0x0F, 0x01, 0x01, 0x01, 0x00),
+    'Ш': (0x15, 0x15, 0x15, 0x15, 0x15, 0x15, 0x1F, 0x00),
+    'Щ': (0x15, 0x15, 0x15, 0x15, 0x15, 0x1F, 0x01, 0x00),
+    'Ъ': (0x18, 0x08, 0x08, 0x0E, 0x09, 0x09, 0x0E, 0x00),
+    'Ы': (0x11, 0x11, 0x11, 0x19, 0x15, 0x15, 0x19, 0x00),
+    'Ь': (0x10, 0x10, 0x10, 0x1E, 0x11, 0x11, 0x1E, 0x00),
+    'Э': (0x0E, 0x11, 0x01, 0x07, 0x01, 0x11, 0x0E, 0x00),
+    'Ю': (0x12, 0x15, 0x15, 0x1D, 0x15, 0x15, 0x12, 0x00),
+    'Я': (0x0F, 0x11, 0x11, 0x0F, 0x05, 0x09, 0x11, 0x00),
+    'Ё': (0x0A, 0x00, 0x1F, 0x10, 0x1E, 0x10, 0x1F, 0x00),
+    'Є': (0x0E, 0x11, 0x10, 0x1E, 0x10, 0x11, 0x0E, 0x00),
+    'Ї': (0x0A, 0x00, 0x0E, 0x04, 0x04, 0x04, 0x0E, 0x00),
+    'Ґ': (0x01, 0x1F, 0x10, 0x10, 0x10, 0x10, 0x10, 0x00),
+    'Ў': (0x0E, 0x00, 0x11, 0x11, 0x0F, 0x01, 0x0E, 0x00),
+}
+
+# Столбики графиков: нижние 1-7 строк ячейки
+for _height, _bar in enumerate("▁▂▃▄▅▆▇", start=1):
+    GLYPHS[_bar] = (0x00,) * (8 - _height) + (0x1F,) * _height
+
+# Буква -> ключ битмапа в GLYPHS (строчные используют битмап заглавной)
+GLYPH_KEYS = {}
+for _letter in GLYPHS:
+    GLYPH_KEYS[_letter] = _letter
+    if _letter.lower() not in LATIN_LOOKALIKES:
+        GLYPH_KEYS[_letter.lower()] = _letter
+
+
+def line_glyphs(text):
+    """Ключи битмапов, нужные строке, в порядке появления."""
+    return list(dict.fromkeys(GLYPH_KEYS[char] for char in text if char in GLYPH_KEYS))
+
+
+def fallback_encode(text):
+    """Транслитерация в ASCII, как до появления своих символов."""
+    return transliteration.transliterate(text).encode('ascii', errors='replace')
+
+
+class GlyphManager:
+    """Распределяет ячейки CGRAM между буквами кадра; загружаются только изменившиеся ячейки."""
+
+    def __init__(self):
+        self.slots = [None] * CGRAM_SLOTS  # Какая буква сейчас загружена в каждую ячейку
+        self.last_frame = None             # (строки, результат) последнего кадра
+
+    def reset(self):
+        """Содержимое CGRAM неизвестно (Arduino перезапустился или кадр потерялся)."""
+        self.slots = [None] * CGRAM_SLOTS
+        self.last_frame = None
+
+    def render(self, lines):
+        """
+        Переводит строки, одновременно видимые на экране, в коды LCD.
+        Возвращает (список bytes по строкам, [(ячейка, битмап), ...] для загрузки).
+        """
+        lines = tuple(lines)
+        if self.last_frame is not None and self.last_frame[0] == lines:
+            return self.last_frame[1], []  # Тот же кадр: ячейки не менялись, загружать нечего
+
+        # Строки берут ячейки по порядку; строка, которой не хватило ячеек, транслитерируется
+        chosen = {}
+        native = []
+        for text in lines:
+            needed = line_glyphs(text)
+            new_keys = [key for key in needed if key not in chosen]
+            if len(chosen) + len(new_keys) <= CGRAM_SLOTS:
+                chosen.update(dict.fromkeys(new_keys))
+                native.append(True)
+            else:
+                native.append(False)
+
+        # Уже загруженные буквы остаются в своих ячейках, новые занимают ячейки, не нужные кадру
+        slot_of = {key: slot for slot, key in enumerate(self.slots) if key in chosen}
+        free_slots = [slot for slot, key in enumerate(self.slots) if key not in slot_of]
+        uploads = []
+        for key in chosen:
+            if key not in slot_of:
+                slot = free_slots.pop(0)
+                self.slots[slot] = key
+                slot_of[key] = slot
+                uploads.append((slot, bytes(GLYPHS[key])))
+
+        rendered = []
+        for text, is_native in zip(lines, native):
+            if not is_native:
+                rendered.append(fallback_encode(text))
+                continue
+            data = bytearray()
+            for char in text:
+                if char < '\x80':
+                    data.append(ord(char))
+                elif char in LATIN_LOOKALIKES:
+                    data.append(ord(LATIN_LOOKALIKES[char]))
+                elif char in ROM_SYMBOLS:
+                    data.append(ROM_SYMBOLS[char])
+                elif char in GLYPH_KEYS:
+                    data.append(GLYPH_CODE_BASE + slot_of[GLYPH_KEYS[char]])
+                else:
+                    data += fallback_encode(char)
+            rendered.append(bytes(data))
+        self.last_frame = (lines, rendered)
+        return rendered, uploads
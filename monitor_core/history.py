@@ -0,0 +1,214 @@
+"""
+История CPU/RAM/диска в памяти: кольцевые буферы array('f') с уровнями 1 минута, 5 минут и 1 час.
+
+Каждый замер за O(1) добавляется во все уровни. Уровень копит сумму, минимум и максимум
+текущего интервала и, когда интервал закончился, кладёт в свои буферы среднее, минимум
+и максимум. Пропущенные интервалы (ПК спал, скрипт не работал) записываются как NaN и
+в сводках не учитываются. Поэтому сводка min/avg/max за любое окно - проход по
+нескольким десяткам чисел, а не по всем замерам.
+
+Если задан config.HISTORY_FILE, история сохраняется в компактный двоичный файл
+(float32, только заполненная часть буферов) и подхватывается при следующем запуске.
+"""
+
+import asyncio
+import math
+import os
+import struct
+import sys
+from array import array
+
+from . import config
+
+# (имя, длина интервала в секундах, сколько интервалов хранить)
+RESOLUTIONS = (
+    ("1m", 60, 180),     # 3 часа
+    ("5m", 300, 288),    # сутки
+    ("1h", 3600, 720),   # 30 дней
+)
+SERIES = ("cpu_percent", "ram_used", "disk_used")  # Ключи замера system.sample_system_stats()
+
+HISTORY_FILE_MAGIC = b"AMHIST1\n"
+LEVEL_HEADER = struct.Struct("<16s8sIIq")  # ряд, уровень, число значений, длина интервала, номер последнего записанного интервала
+NAN = float("nan")
+
+
+class RingBuffer:
+    """Кольцевой буфер float32 фиксированной длины: добавление за O(1), старые значения затираются."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.values = array("f", [NAN]) * capacity
+        self.end = 0    # Куда пишется следующее значение
+        self.count = 0  # Сколько значений записано (не больше capacity)
+
+    def append(self, value):
+        self.values[self.end] = value
+        self.end = (self.end + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def last(self, n):
+        """Последние n значений, от старых к новым."""
+        n = min(n, self.count)
+        start = (self.end - n) % self.capacity
+        if start + n <= self.capacity:
+            return self.values[start:start + n]
+        return self.values[start:] + self.values[:self.end]
+
+
+class Level:
+    """Один уровень истории: среднее, минимум и максимум за интервалы по step секунд."""
+
+    def __init__(self, step, capacity):
+        self.step = step
+        self.avg = RingBuffer(capacity)
+        self.min = RingBuffer(capacity)
+        self.max = RingBuffer(capacity)
+        self.bucket = None  # Номер текущего интервала (время // step)
+        self.reset_bucket()
+
+    def reset_bucket(self):
+        self.total = 0.0
+        self.samples = 0
+        self.low = math.inf
+        self.high = -math.inf
+
+    def push(self, avg, low, high):
+        self.avg.append(avg)
+        self.min.append(low)
+        self.max.append(high)
+
+    def add(self, timestamp, value):
+        bucket = int(timestamp // self.step)
+        if self.bucket is None:
+            self.bucket = bucket
+        elif bucket > self.bucket:
+            if self.samples:
+                self.push(self.total / self.samples, self.low, self.high)
+                self.reset_bucket()
+            for _ in range(min(bucket - self.bucket - 1, self.avg.capacity)):
+                self.push(NAN, NAN, NAN)  # Интервалы без замеров
+            self.bucket = bucket
+        # Если часы ушли назад, замер достаётся текущему интервалу
+        self.total += value
+        self.samples += 1
+        self.low = min(self.low, value)
+        self.high = max(self.high, value)
+
+    def averages(self, n):
+        """Средние последних n интервалов, включая текущий незаконченный."""
+        if not self.samples:
+            return list(self.avg.last(n))
+        return list(self.avg.last(n - 1)) + [self.total / self.samples]
+
+    def summary(self, n):
+        """(минимум, среднее, максимум) за те же n интервалов, что и averages(n), или None, если замеров не было."""
+        finished = n - 1 if self.samples else n  # Текущий интервал - один из n
+        avgs = [value for value in self.avg.last(finished) if not math.isnan(value)]
+        lows = [value for value in self.min.last(finished) if not math.isnan(value)]
+        highs = [value for value in self.max.last(finished) if not math.isnan(value)]
+        if self.samples:
+            avgs.append(self.total / self.samples)
+            lows.append(self.low)
+            highs.append(self.high)
+        if not avgs:
+            return None
+        return min(lows), sum(avgs) / len(avgs), max(highs)
+
+
+def new_series():
+    return {name: Level(step, capacity) for name, step, capacity in RESOLUTIONS}
+
+
+history = {series: new_series() for series in SERIES}  # ряд -> уровень -> Level
+
+
+# --- Запись и чтение ---
+def record(sample):
+    """Добавляет замер (словарь с ключами SERIES и "time") во все уровни."""
+    for series, levels in history.items():
+        value = sample[series]
+        for level in levels.values():
+            level.add(sample["time"], value)
+
+
+def averages(series, resolution, n):
+    return history[series][resolution].averages(n)
+
+
+def summary(series, resolution, n):
+    return history[series][resolution].summary(n)
+
+
+# --- Файл истории ---
+def save_history(path=None):
+    """Записывает все уровни в файл атомарно (через временный файл). Незаконченные интервалы не сохраняются."""
+    path = path or config.HISTORY_FILE
+    if not path:
+        return
+    chunks = [HISTORY_FILE_MAGIC]
+    for series, levels in history.items():
+        for resolution, level in levels.items():
+            # Текущий интервал не сохраняется, последний записанный - предыдущий
+            header = LEVEL_HEADER.pack(series.encode(), resolution.encode(), level.avg.count, level.step,
+                                       -1 if level.bucket is None else level.bucket - 1)
+            chunks.append(header)
+            for ring in (level.avg, level.min, level.max):
+                values = ring.last(ring.count)
+                if sys.byteorder == "big":
+                    values.byteswap()
+                chunks.append(values.tobytes())
+    temp_path = f"{path}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(b"".join(chunks))
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Could not save history to {path}: {e}")
+
+
+def load_history(path=None):
+    """Читает файл истории, если он есть. Уровни, которых нет в RESOLUTIONS или у которых другой шаг, пропускаются."""
+    path = path or config.HISTORY_FILE
+    if not path or not os.path.exists(path):
+        return
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        if not data.startswith(HISTORY_FILE_MAGIC):
+            raise ValueError("not a history file")
+        offset = len(HISTORY_FILE_MAGIC)
+        loaded = {series: new_series() for series in SERIES}
+        while offset < len(data):
+            series, resolution, count, step, bucket = LEVEL_HEADER.unpack_from(data, offset)
+            offset += LEVEL_HEADER.size
+            rings = []
+            for _ in range(3):
+                values = array("f")
+                values.frombytes(data[offset:offset + count * values.itemsize])
+                if len(values) != count:
+                    raise ValueError("truncated history file")
+                if sys.byteorder == "big":
+                    values.byteswap()
+                rings.append(values)
+                offset += count * values.itemsize
+            level = loaded.get(series.rstrip(b"\0").decode(), {}).get(resolution.rstrip(b"\0").decode())
+            if level is None or level.step != step:
+                continue
+            for avg, low, high in zip(*rings):
+                level.push(avg, low, high)
+            level.bucket = None if bucket < 0 else bucket
+    except (OSError, ValueError, struct.error) as e:
+        print(f"History file {path} ignored: {e}")
+        return
+    history.update(loaded)
+    print(f"History loaded from {path}")
+
+
+async def history_save_task():
+    if not config.HISTORY_FILE:
+        return
+    while True:
+        await asyncio.sleep(config.HISTORY_SAVE_INTERVAL_SEC)
+        save_history()
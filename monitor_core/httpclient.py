@@ -0,0 +1,43 @@
+"""
+Общая HTTP-сессия (keep-alive, переиспользование соединений) и отложенная загрузка
+тяжёлых модулей: aiohttp и yandex_music импортируются при первой необходимости.
+"""
+
+import asyncio
+import importlib
+import sys
+import time
+
+HTTP_KEEPALIVE_TIMEOUT_SEC = 60
+http_session = None
+aiohttp = None  # Загружается в load_aiohttp() при первой необходимости
+
+
+async def import_in_background(name):
+    """Импортирует модуль в отдельном потоке, чтобы цикл событий не стоял, пока он загружается."""
+    module = sys.modules.get(name)
+    if module is None:
+        started = time.time()
+        module = await asyncio.to_thread(importlib.import_module, name)
+        print(f"Loaded {name} in {(time.time() - started) * 1000:.0f} ms")
+    return module
+
+
+async def load_aiohttp():
+    global aiohttp
+    if aiohttp is None:
+        aiohttp = await import_in_background("aiohttp")
+    return aiohttp
+
+
+def get_http_session():
+    global http_session
+    if http_session is None or http_session.closed:
+        connector = aiohttp.TCPConnector(limit=8, keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT_SEC)
+        http_session = aiohttp.ClientSession(connector=connector)
+    return http_session
+
+
+async def close_http_session():
+    if http_session is not None and not http_session.closed:
+        await http_session.close()
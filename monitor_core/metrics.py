@@ -0,0 +1,149 @@
+"""
+Замеры горячих участков: таймеры и счётчики, задержка цикла событий, байты и кадры
+в секунду по последовательному порту. Отдаются локальным HTTP-сервером:
+/metrics - текст Prometheus, /metrics.json - то же в JSON.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from . import config, display, httpclient
+from .supervisor import task_health
+
+METRIC_PREFIX = "arduino_monitor"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LOOP_LAG_INTERVAL_SEC = 0.5  # Как часто проверять, не стоит ли цикл событий
+RATE_WINDOW_SEC = 5          # Окно усреднения байт и кадров в секунду
+SERIAL_COUNTERS = ("serial_bytes_in", "serial_bytes_out", "serial_frames_in", "serial_frames_out")
+
+counters = {}  # имя -> значение, только растёт
+timers = {}    # имя -> {"count", "sum", "max", "last"} в секундах
+gauges = {"loop_lag_seconds": 0.0, "loop_lag_max_seconds": 0.0}
+rates = {}     # имя счётчика -> прирост в секунду за последние RATE_WINDOW_SEC
+rate_samples = deque(maxlen=RATE_WINDOW_SEC + 1)  # (время, значения SERIAL_COUNTERS) раз в секунду
+
+
+# --- Сбор ---
+def count(name, value=1):
+    counters[name] = counters.get(name, 0) + value
+
+
+def gauge(name, value):
+    gauges[name] = value
+
+
+def observe(name, seconds):
+    stats = timers.get(name)
+    if stats is None:
+        stats = timers[name] = {"count": 0, "sum": 0.0, "max": 0.0, "last": 0.0}
+    stats["count"] += 1
+    stats["sum"] += seconds
+    stats["last"] = seconds
+    if seconds > stats["max"]:
+        stats["max"] = seconds
+
+
+@contextmanager
+def timer(name):
+    """Время выполнения блока (в том числе с await внутри); записывается и при исключении."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started)
+
+
+def snapshot():
+    return {
+        "counters": dict(counters),
+        "timers": {name: dict(stats) for name, stats in timers.items()},
+        "gauges": dict(gauges),
+        "rates": dict(rates),
+        "tasks": {name: dict(health) for name, health in task_health.items()},
+    }
+
+
+# --- Экспорт ---
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus():
+    """Текстовый формат Prometheus (version 0.0.4)."""
+    out = []
+    for name, value in sorted(counters.items()):
+        out.append(f"# TYPE {METRIC_PREFIX}_{name}_total counter")
+        out.append(f"{METRIC_PREFIX}_{name}_total {value}")
+    for name, value in sorted(rates.items()):
+        out.append(f"# TYPE {METRIC_PREFIX}_{name}_per_second gauge")
+        out.append(f"{METRIC_PREFIX}_{name}_per_second {value:.3f}")
+    for name, value in sorted(gauges.items()):
+        out.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+        out.append(f"{METRIC_PREFIX}_{name} {value:.6f}")
+
+    duration = f"{METRIC_PREFIX}_duration_seconds"
+    out.append(f"# TYPE {duration} summary")
+    for name, stats in sorted(timers.items()):
+        out.append(f'{duration}_count{{name="{escape_label(name)}"}} {stats["count"]}')
+        out.append(f'{duration}_sum{{name="{escape_label(name)}"}} {stats["sum"]:.6f}')
+    out.append(f"# TYPE {duration}_max gauge")
+    for name, stats in sorted(timers.items()):
+        out.append(f'{duration}_max{{name="{escape_label(name)}"}} {stats["max"]:.6f}')
+
+    out.append(f"# TYPE {METRIC_PREFIX}_task_state gauge")
+    for name, health in sorted(task_health.items()):
+        out.append(f'{METRIC_PREFIX}_task_state{{task="{escape_label(name)}",state="{health["state"]}"}} 1')
+    out.append(f"# TYPE {METRIC_PREFIX}_task_restarts_total counter")
+    for name, health in sorted(task_health.items()):
+        out.append(f'{METRIC_PREFIX}_task_restarts_total{{task="{escape_label(name)}"}} {health["restarts"]}')
+    return "\n".join(out) + "\n"
+
+
+# --- Фоновые задачи ---
+async def metrics_sampler_task():
+    """Задержка цикла событий (насколько позже обещанного проснулся sleep) и скорости порта."""
+    loop = asyncio.get_running_loop()
+    next_rate_sample = 0
+    while True:
+        expected = loop.time() + LOOP_LAG_INTERVAL_SEC
+        await asyncio.sleep(LOOP_LAG_INTERVAL_SEC)
+        lag = max(0.0, loop.time() - expected)
+        gauges["loop_lag_seconds"] = lag
+        gauges["loop_lag_max_seconds"] = max(gauges["loop_lag_max_seconds"], lag)
+
+        now = time.time()
+        if now >= next_rate_sample:
+            next_rate_sample = now + 1
+            rate_samples.append((now, [counters.get(name, 0) for name in SERIAL_COUNTERS]))
+            first_time, first_values = rate_samples[0]
+            elapsed = now - first_time
+            for name, first, last in zip(SERIAL_COUNTERS, first_values, rate_samples[-1][1]):
+                rates[name] = (last - first) / elapsed if elapsed > 0 else 0.0
+
+
+async def metrics_server_task():
+    """HTTP-сервер метрик на METRICS_HOST:METRICS_PORT; METRICS_PORT = None - сервер не запускается."""
+    if config.METRICS_PORT is None:
+        return
+    await display.wait_for_first_frame()
+    web = await httpclient.import_in_background("aiohttp.web")
+
+    async def handle_metrics(request):
+        return web.Response(body=render_prometheus().encode(), headers={"Content-Type": PROMETHEUS_CONTENT_TYPE})
+
+    async def handle_metrics_json(request):
+        return web.json_response(snapshot())
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_get("/metrics.json", handle_metrics_json)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, config.METRICS_HOST, config.METRICS_PORT).start()
+        print(f"Metrics at http://{config.METRICS_HOST}:{config.METRICS_PORT}/metrics")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
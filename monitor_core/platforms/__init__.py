@@ -0,0 +1,30 @@
+"""
+Платформенные backend'ы: чем опрашивать сеть и диск.
+
+Backend - модуль с одинаковым набором имён:
+    DEFAULT_DISK_PATH             корень системного диска для psutil.disk_usage()
+    SERIAL_OPEN_HINTS             подсказки в консоль, если порт не открылся
+    network_signature()           дешёвый отпечаток состояния сети (без запуска процессов)
+    read_network_info(signature)  корутина -> (SSID, IP, успех); при неуспехе опрос повторится позже
+
+linux - эталонная реализация (nmcli), windows разбирает вывод netsh
+(разбор проверяется на записанном выводе: python -m monitor_core.platforms.windows).
+"""
+
+import importlib
+import sys
+
+from .. import config
+
+_backend = None
+
+
+def current():
+    """Backend, выбранный настройкой PLATFORM ("auto" - по ОС, на которой запущен скрипт)."""
+    global _backend
+    if _backend is None:
+        name = config.PLATFORM
+        if name == "auto":
+            name = "windows" if sys.platform == "win32" else "linux"
+        _backend = importlib.import_module(f"{__name__}.{name}")
+    return _backend
@@ -0,0 +1,70 @@
+"""Linux: SSID через nmcli, адрес и состояние интерфейса Wi-Fi через psutil."""
+
+import asyncio
+import os
+import socket
+import subprocess
+
+import psutil
+
+from .. import config
+
+DEFAULT_DISK_PATH = "/"
+SERIAL_OPEN_HINTS = (
+    "You might need to add your user to the 'dialout' group: sudo usermod -a -G dialout $USER",
+    "After that, reboot or log out and log in again.",
+)
+
+
+def network_signature():
+    """Дешёвый отпечаток состояния интерфейса (без запуска процессов)."""
+    interface = config.NETWORK_INTERFACE
+    stats = psutil.net_if_stats().get(interface)
+    addrs = psutil.net_if_addrs().get(interface, [])
+    return (
+        stats.isup if stats else False,
+        tuple(sorted((a.family, a.address) for a in addrs)),
+    )
+
+
+def get_interface_ip(interface):
+    ip_address = "No IP"
+    for addr in psutil.net_if_addrs().get(interface, []):
+        if addr.family == socket.AF_INET:
+            return addr.address
+        if addr.family == socket.AF_INET6 and ip_address == "No IP":
+            ip_address = addr.address.split('%')[0]
+    return ip_address
+
+
+async def query_ssid(interface):
+    """Один асинхронный вызов nmcli: SSID активной сети без пересканирования."""
+    proc = await asyncio.create_subprocess_exec(
+        'nmcli', '-t', '-f', 'ACTIVE,SSID', 'dev', 'wifi', 'list', 'ifname', interface, '--rescan', 'no',
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        env={**os.environ, "LC_ALL": "C"},
+    )
+    stdout, _ = await proc.communicate()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, 'nmcli')
+    for line in stdout.decode('utf-8', errors='ignore').splitlines():
+        active, _, ssid = line.partition(':')
+        if active == "yes":
+            return ssid.replace('\\:', ':') or "No Network"
+    return "No Network"
+
+
+async def read_network_info(signature):
+    interface = config.NETWORK_INTERFACE
+    is_up = signature[0]
+    success = True
+    try:
+        ssid = await query_ssid(interface) if is_up else "No Network"
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        ssid = "Error cmd"
+        success = False
+    except Exception as e:
+        ssid = f"Err: {e}"
+        success = False
+    return ssid, get_interface_ip(interface), success
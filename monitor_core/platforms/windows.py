@@ -0,0 +1,78 @@
+"""
+Windows: SSID из `netsh wlan show interfaces`, адрес - по маршруту по умолчанию.
+
+Разбор вывода netsh - чистая функция parse_netsh_ssid(); записанный вывод английской
+и русской Windows лежит в netsh_fixtures/, проверка: tests/test_netsh_parser.py
+"""
+
+import asyncio
+import socket
+import subprocess
+
+import psutil
+
+DEFAULT_DISK_PATH = "C:\\"
+SERIAL_OPEN_HINTS = (
+    "Check the COM port in Device Manager or set arduino_port to \"auto\" in config.json",
+)
+NETSH_ENCODING = "cp866"  # OEM-кодировка консоли русской Windows
+
+
+def network_signature():
+    """Дешёвый отпечаток состояния всех интерфейсов (без запуска процессов)."""
+    stats = psutil.net_if_stats()
+    return tuple(sorted(
+        (name, stats[name].isup if name in stats else False,
+         tuple(sorted((a.family, a.address) for a in addrs)))
+        for name, addrs in psutil.net_if_addrs().items()
+    ))
+
+
+def parse_netsh_ssid(text):
+    """SSID первого подключённого интерфейса. Поле "SSID" не переводится, "BSSID"/"AP BSSID" пропускаются."""
+    for line in text.splitlines():
+        name, separator, value = line.partition(":")
+        if separator and name.strip() == "SSID":
+            return value.strip() or "No Network"
+    return "No Network"
+
+
+async def query_ssid():
+    """Один асинхронный вызов netsh: SSID текущего Wi-Fi подключения."""
+    proc = await asyncio.create_subprocess_exec(
+        'netsh', 'wlan', 'show', 'interfaces',
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    stdout, _ = await proc.communicate()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, 'netsh')
+    return parse_netsh_ssid(stdout.decode(NETSH_ENCODING, errors='ignore'))
+
+
+def get_primary_ip():
+    """Адрес интерфейса, через который идёт маршрут наружу (UDP connect пакетов не отправляет)."""
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.settimeout(2)
+        s.connect(("8.8.8.8", 80))
+        ip_address = s.getsockname()[0]
+        s.close()
+        return ip_address
+    except Exception as e:
+        print(f"Error getting IP: {e}")
+        return "No IP"
+
+
+async def read_network_info(signature):
+    success = True
+    try:
+        ssid = await query_ssid()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        ssid = "Error cmd"
+        success = False
+    except Exception as e:
+        ssid = f"Err: {e}"
+        success = False
+    return ssid, get_primary_ip(), success
+
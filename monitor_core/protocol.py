@@ -0,0 +1,179 @@
+"""
+Кадровый протокол обмена между ПК и скетчем arduino_monitor.ino.
+
+Формат кадра:
+    0xA5 | версия | тип | длина | данные[длина] | CRC8
+
+CRC8 (полином 0x07, начальное значение 0x00) считается по байтам
+от версии до последнего байта данных. Кадры с другой версией протокола,
+слишком длинные или с неверной контрольной суммой отбрасываются.
+"""
+
+import struct
+
+# --- Параметры кадра ---
+FRAME_SOF = 0xA5
+PROTOCOL_VERSION = 1
+MAX_PAYLOAD = 64  # Должно совпадать с MAX_FRAME_PAYLOAD в скетче
+LCD_COLS = 16
+MARQUEE_MAX_TEXT = MAX_PAYLOAD - 3
+
+# --- Типы сообщений: ПК -> Arduino ---
+MSG_IDLE_LINE = 0x01     # [строка][текст]  — одна строка текущего экрана
+MSG_SYSTEM_STATS = 0x02  # [строка1 16][строка2 16] — ответ старым скетчам на CMD_REQ_SYSTEM_STATS
+MSG_NETWORK_INFO = 0x03  # [строка1 16][строка2 16] — ответ старым скетчам на CMD_REQ_NETWORK_INFO
+MSG_KEEPALIVE = 0x04     # без данных
+MSG_BAUD_PROPOSE = 0x05  # [скорость u32 LE] — предложить новую скорость порта
+MSG_BAUD_TEST = 0x06     # [тестовые байты] — Arduino возвращает их обратно тем же типом
+MSG_BAUD_CONFIRM = 0x07  # без данных — проверка прошла, остаёмся на новой скорости
+MSG_MARQUEE = 0x08       # [строка][шаг мс u16 LE][текст] — бегущая строка, Arduino прокручивает её сам
+MSG_GLYPH = 0x09         # [ячейка 0-7][8 байт битмапа] — свой символ в CGRAM дисплея (см. monitor_core/glyphs.py)
+MSG_HELLO_REQUEST = 0x0A # без данных — Arduino отвечает MSG_HELLO
+
+# --- Типы сообщений: Arduino -> ПК ---
+MSG_COMMAND = 0x10       # [код команды] — запросы старых скетчей, которые сами переключали экраны
+MSG_ACK = 0x11           # [строка][CRC8 кадра] — строка экрана ожидания выведена (старые скетчи шлют только [строка])
+MSG_BAUD_ACCEPT = 0x12   # [скорость u32 LE] — принятая скорость или 0, если она не поддерживается
+MSG_BUTTON = 0x13        # [код кнопки] — кнопка нажата, что делать, решает ПК
+MSG_HELLO = 0x14         # [HELLO_BANNER] — скетч запустился или ответ на MSG_HELLO_REQUEST
+
+# --- Коды команд Arduino ---
+CMD_REQ_WEATHER = 1
+CMD_REQ_WEATHER_FORCE = 2
+CMD_REQ_SYSTEM_STATS = 3
+CMD_REQ_NETWORK_INFO = 4
+
+# --- Коды кнопок ---
+BUTTON_A = 1
+BUTTON_B = 2
+
+# --- Приветствие скетча: по нему скрипт узнаёт свой Arduino среди последовательных портов ---
+HELLO_BANNER = b"arduino-monitor"
+
+# --- Тестовый шаблон для проверки скорости: все уровни битов и чередования 0/1 ---
+BAUD_TEST_PATTERN = bytes((0x55, 0xAA, 0x00, 0xFF, FRAME_SOF)) + bytes((i * 37 + 11) & 0xFF for i in range(27))
+
+COMMAND_NAMES = {
+    CMD_REQ_WEATHER: "REQ_WEATHER",
+    CMD_REQ_WEATHER_FORCE: "REQ_WEATHER_FORCE",
+    CMD_REQ_SYSTEM_STATS: "REQ_SYSTEM_STATS",
+    CMD_REQ_NETWORK_INFO: "REQ_NETWORK_INFO",
+}
+
+BUTTON_NAMES = {
+    BUTTON_A: "A",
+    BUTTON_B: "B",
+}
+
+
+def _build_crc8_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+_CRC8_TABLE = _build_crc8_table()
+
+
+def crc8(data, crc=0):
+    for byte in data:
+        crc = _CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+def encode_frame(msg_type, payload=b""):
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError(f"Payload too long: {len(payload)} > {MAX_PAYLOAD}")
+    frame = bytearray((FRAME_SOF, PROTOCOL_VERSION, msg_type, len(payload)))
+    frame += payload
+    frame.append(crc8(memoryview(frame)[1:]))
+    return bytes(frame)
+
+
+def encode_text(text, width=LCD_COLS):
+    """
+    Строка для LCD: ровно width байт. Строка str переводится в ASCII (остальное -> '?'),
+    bytes считаются уже готовыми кодами LCD (см. glyphs.GlyphManager.render).
+    """
+    if isinstance(text, str):
+        text = text.encode('ascii', errors='replace')
+    return text.ljust(width)[:width]
+
+
+def encode_idle_line(row, text):
+    return encode_frame(MSG_IDLE_LINE, bytes((row,)) + encode_text(text))
+
+
+def encode_marquee(row, text, step_sec):
+    """Бегущая строка: текст уходит один раз, дальше Arduino сдвигает его на символ каждые step_sec."""
+    if isinstance(text, str):
+        text = text.encode('ascii', errors='replace')
+    header = struct.pack("<BH", row, max(1, min(int(step_sec * 1000), 0xFFFF)))
+    return encode_frame(MSG_MARQUEE, header + text[:MARQUEE_MAX_TEXT])
+
+
+def encode_glyph(slot, bitmap):
+    return encode_frame(MSG_GLYPH, bytes((slot,)) + bytes(bitmap))
+
+
+def encode_card(msg_type, line1, line2):
+    return encode_frame(msg_type, encode_text(line1) + encode_text(line2))
+
+
+def encode_command(command):
+    return encode_frame(MSG_COMMAND, bytes((command,)))
+
+
+def encode_baud(msg_type, rate):
+    return encode_frame(msg_type, struct.pack("<I", rate))
+
+
+def decode_baud(payload):
+    return struct.unpack("<I", payload)[0] if len(payload) == 4 else 0
+
+
+class FrameDecoder:
+    """Инкрементальный разбор потока байтов на кадры; данные можно подавать любыми кусками."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.crc_errors = 0
+        self.dropped_bytes = 0
+
+    def feed(self, data):
+        """Добавляет байты в буфер и возвращает список полных кадров (тип, данные)."""
+        self.buffer += data
+        frames = []
+        while True:
+            start = self.buffer.find(FRAME_SOF)
+            if start < 0:
+                self.dropped_bytes += len(self.buffer)
+                self.buffer.clear()
+                break
+            if start > 0:
+                self.dropped_bytes += start
+                del self.buffer[:start]
+            if len(self.buffer) < 4:
+                break
+
+            version, msg_type, length = self.buffer[1], self.buffer[2], self.buffer[3]
+            if version != PROTOCOL_VERSION or length > MAX_PAYLOAD:
+                self.dropped_bytes += 1
+                del self.buffer[:1]  # Это был не заголовок — ищем следующий SOF
+                continue
+            frame_end = 4 + length + 1
+            if len(self.buffer) < frame_end:
+                break
+
+            if crc8(self.buffer[1:frame_end - 1]) != self.buffer[frame_end - 1]:
+                self.crc_errors += 1
+                self.dropped_bytes += 1
+                del self.buffer[:1]
+                continue
+
+            frames.append((msg_type, bytes(self.buffer[4:frame_end - 1])))
+            del self.buffer[:frame_end]
+        return frames
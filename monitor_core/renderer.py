@@ -0,0 +1,125 @@
+"""
+Декларативная вёрстка экранов LCD 16x2.
+
+Экран (Screen) — это две строки (Line). Каждая строка объявляет, от каких полей она
+зависит, и функцию, которая собирает из них текст. Renderer пересобирает строку только
+тогда, когда изменилось одно из её полей, а ширина, обрезка и дополнение пробелами
+задаются здесь и больше нигде.
+"""
+
+LCD_COLS = 16
+LCD_ROWS = 2
+SPARK_BARS = " ▁▂▃▄▅▆▇█"  # Высота 0-8 восьмых; ▁-▇ рисуются в CGRAM (см. glyphs.py), █ есть в шрифте LCD
+
+
+# --- Правила ширины ---
+def fit(text, width=LCD_COLS):
+    """Ровно width символов: длинное обрезается, короткое дополняется пробелами."""
+    return text.ljust(width)[:width]
+
+
+def justify(left, right, width=LCD_COLS):
+    """Левая часть у левого края, правая у правого, между ними хотя бы один пробел; не влезло — обрезается левая."""
+    left = left[:max(0, width - len(right) - 1)]
+    return fit(left + " " * (width - len(left) - len(right)) + right, width)
+
+
+# --- Описание экранов ---
+class Line:
+    """Строка экрана: build(*значения полей) -> текст. Длинная строка с marquee=True становится бегущей."""
+
+    def __init__(self, fields, build, marquee=False):
+        self.fields = fields
+        self.build = build
+        self.marquee = marquee
+
+
+class Screen:
+    def __init__(self, name, lines):
+        self.name = name
+        self.lines = lines
+
+
+class Renderer:
+    """Собирает кадр экрана, пересчитывая только строки с изменившимися полями."""
+
+    def __init__(self):
+        self.cache = {}  # (экран, строка) -> (значения полей, готовая строка)
+
+    def render(self, screen, fields):
+        """Возвращает кортеж строк экрана; бегущая строка возвращается как ("marquee", текст)."""
+        frame = []
+        for row, line in enumerate(screen.lines):
+            values = tuple(fields[name] for name in line.fields)
+            cached = self.cache.get((screen.name, row))
+            if cached is not None and cached[0] == values:
+                frame.append(cached[1])
+                continue
+
+            text = line.build(*values)
+            content = ("marquee", text) if line.marquee and len(text) > LCD_COLS else fit(text)
+            self.cache[(screen.name, row)] = (values, content)
+            frame.append(content)
+        return tuple(frame)
+
+
+def sparkline(values, high):
+    """
+    График по столбику на значение, высота - восьмые доли ячейки от 0 до high.
+    Любое значение видно хотя бы нижним столбиком, пропуск (None) - пробел.
+    """
+    bars = []
+    for value in values:
+        if value is None:
+            bars.append(" ")
+        else:
+            bars.append(SPARK_BARS[max(1, min(round(value / high * 8), 8))])
+    return "".join(bars)
+
+
+def history_summary(label, summary):
+    if summary is None:
+        return f"{label}: no data"
+    low, avg, high = summary
+    return f"{label} {low:.0f}/{avg:.0f}/{high:.0f}%"
+
+
+# --- Экраны ---
+def weather_line(status, description, temperature):
+    if status == "UPDATING":
+        return "Обновляю..."
+    if status == "FAILED":
+        return "Погода: Ошибка!"
+    return justify(description, f"{temperature:+d}C")
+
+
+CLOCK_WEATHER = Screen("clock_weather", (
+    Line(("date_full", "time"), justify),
+    Line(("weather_status", "weather_description", "temperature"), weather_line),
+))
+
+NOW_PLAYING = Screen("now_playing", (
+    Line(("date_short", "time", "temperature"), lambda date, time, temperature: f"{date} {time} {temperature:+d}C"),
+    Line(("track",), lambda track: track, marquee=True),  # Прокручивает сам Arduino
+))
+
+SYSTEM_STATS = Screen("system_stats", (
+    Line(("cpu_percent", "ram_used_gb"), lambda cpu, ram: f"CPU:{cpu:2.0f}% RAM:{ram:4.1f}"),
+    Line(("disk_used_gb", "disk_total_gb"), lambda used, total: f"ROM:{used:4.1f}GB/{total:4.1f}GB"),
+))
+
+# История за последние минуты: min/avg/max в процентах и график, последний столбик - текущая минута
+CPU_HISTORY = Screen("cpu_history", (
+    Line(("summary",), lambda summary: history_summary("CPU", summary)),
+    Line(("averages",), lambda averages: sparkline(averages, 100).rjust(LCD_COLS)),
+))
+
+RAM_HISTORY = Screen("ram_history", (
+    Line(("summary",), lambda summary: history_summary("RAM", summary)),
+    Line(("averages",), lambda averages: sparkline(averages, 100).rjust(LCD_COLS)),
+))
+
+NETWORK_INFO = Screen("network_info", (
+    Line(("ssid",), lambda ssid: f"WIFI:{ssid}"),
+    Line(("ip",), lambda ip: ip),
+))
@@ -0,0 +1,112 @@
+"""
+Расписание экранов: какой экран на LCD, решает ПК, скетч только сообщает о кнопках.
+Карточки статистики держатся в тёплом кэше, ответ на запрос Arduino - копия из памяти.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+from . import config, metrics, protocol, renderer, transport
+from .sources import music, network, system, weather
+
+screen_renderer = renderer.Renderer()  # Строки экранов пересобираются только при изменении полей
+
+STATS_CARDS = ("system_stats", "cpu_history", "ram_history", "network_info")  # Карточки по кнопке B, по порядку
+screen_schedule = {"cards": [], "slot_end": 0}  # Оставшиеся карточки (первая на экране) и конец её показа
+screen_changed = asyncio.Event()  # Будит цикл отправки сразу после нажатия кнопки
+
+# --- Тёплый кэш карточек ---
+CARD_SCREENS = {  # карточка -> (экран, функция полей)
+    "system_stats": (renderer.SYSTEM_STATS, system.get_system_fields),
+    "cpu_history": (renderer.CPU_HISTORY, lambda: system.get_history_fields("cpu_percent")),
+    "ram_history": (renderer.RAM_HISTORY, lambda: system.get_history_fields("ram_used")),
+    "network_info": (renderer.NETWORK_INFO, lambda: network.network_info_cache),
+}
+CARD_MESSAGE_TYPES = {"system_stats": protocol.MSG_SYSTEM_STATS, "network_info": protocol.MSG_NETWORK_INFO}
+card_cache = {}  # карточка -> (время сборки, строки, кадр для скетчей, запрашивающих карточки, или None)
+
+
+def get_clock_fields():
+    now = datetime.now()
+    return {
+        "date_full": now.strftime("%d/%m/%y"),
+        "date_short": now.strftime("%d/%m"),
+        "time": now.strftime("%H:%M"),
+    }
+
+
+def build_idle_frame():
+    """Кадр экрана ожидания: часы и погода или, пока играет музыка, трек."""
+    fields = get_clock_fields()
+    fields["temperature"] = weather.weather_data["temperature"]
+    if music.current_track_info["is_playing"]:
+        fields["track"] = music.current_track_info["full_string"]
+        return screen_renderer.render(renderer.NOW_PLAYING, fields)
+
+    fields["weather_status"] = weather.weather_status
+    fields["weather_description"] = weather.weather_data["description"]
+    return screen_renderer.render(renderer.CLOCK_WEATHER, fields)
+
+
+# --- Карточки статистики ---
+def current_card(current_time):
+    """Карточка, которая сейчас должна быть на экране, или None для экрана ожидания."""
+    cards = screen_schedule["cards"]
+    while cards and current_time >= screen_schedule["slot_end"]:
+        cards.pop(0)
+        screen_schedule["slot_end"] += config.CARD_DISPLAY_DURATION_SEC
+    return cards[0] if cards else None
+
+
+def build_card(card, current_time):
+    screen, get_fields = CARD_SCREENS[card]
+    with metrics.timer(f"build_card_{card}"):
+        lines = screen_renderer.render(screen, get_fields())
+    msg_type = CARD_MESSAGE_TYPES.get(card)  # Графиков истории в старых скетчах нет
+    entry = (current_time, lines, msg_type and protocol.encode_card(msg_type, *lines))
+    card_cache[card] = entry
+    return entry
+
+
+def cached_card(card, current_time):
+    """Карточка из тёплого кэша; собирается на месте, только если кэш старше CARD_CACHE_MAX_STALENESS_SEC."""
+    entry = card_cache.get(card)
+    if entry is None or current_time - entry[0] > config.CARD_CACHE_MAX_STALENESS_SEC:
+        entry = build_card(card, current_time)
+    return entry
+
+
+def build_screen_frame(current_time):
+    card = current_card(current_time)
+    return cached_card(card, current_time)[1] if card else build_idle_frame()
+
+
+def seconds_to_next_card(current_time):
+    if not screen_schedule["cards"]:
+        return None
+    return max(0, screen_schedule["slot_end"] - current_time)
+
+
+def handle_button(button, current_time):
+    cards = screen_schedule["cards"]
+    if button == protocol.BUTTON_A:
+        if cards:  # Во время показа статистики: вернуться к экрану ожидания
+            cards.clear()
+            transport.response_started[("idle", 0)] = current_time
+        else:      # В режиме ожидания: принудительное обновление погоды
+            weather.request_weather_update()
+    elif button == protocol.BUTTON_B:
+        if not cards:  # Запускаем показ карточек статистики
+            screen_schedule["cards"] = list(STATS_CARDS)
+            screen_schedule["slot_end"] = current_time + config.CARD_DISPLAY_DURATION_SEC
+            transport.response_started[("idle", 0)] = current_time  # Первая строка карточки всегда отличается от часов
+    screen_changed.set()
+
+
+async def card_cache_refresh_task():
+    while True:
+        current_time = time.time()
+        for card in STATS_CARDS:
+            build_card(card, current_time)
+        await asyncio.sleep(config.CARD_CACHE_MAX_STALENESS_SEC / 2)
@@ -0,0 +1,6 @@
+"""
+Источники данных для экранов: системные метрики, сеть, погода, Яндекс.Музыка.
+
+Каждый источник держит свежие данные в памяти и обновляет их своей фоновой задачей,
+поэтому сборка кадра никогда не ждёт сети, nmcli/netsh или psutil.
+"""
@@ -0,0 +1,288 @@
+"""
+Яндекс.Музыка: текущий трек по постоянному WebSocket-соединению Ynison,
+метаданные треков через yandex_music с LRU-кэшем.
+"""
+
+import asyncio
+import json
+import random
+import string
+import time
+from collections import OrderedDict
+
+from .. import config, display, httpclient, metrics
+
+MUSIC_TOKEN_PLACEHOLDERS = ("", "YOUR_TOKEN", "YANDEX_MUSIC_TOKEN")  # Токен не задан - музыка отключена
+
+current_track_info = {
+    "is_playing": False,
+    "is_paused": False,
+    "artist": "",
+    "title": "",
+    "full_string": ""
+}
+
+# --- Постоянное соединение с Ynison ---
+YNISON_DEVICE_ID = "".join(random.choice(string.ascii_lowercase) for _ in range(16))  # Один на весь запуск
+YNISON_HEARTBEAT_SEC = 30
+YNISON_RECONNECT_MIN_SEC = 1
+YNISON_RECONNECT_MAX_SEC = 60
+MUSIC_TRACK_RETRY_SEC = 3  # Повтор запроса метаданных трека при ошибке API
+ynison_state = {"connected": False, "paused": True, "playable_id": None}
+ynison_state_changed = asyncio.Event()
+
+# --- Кэш метаданных треков (LRU + TTL) ---
+TRACK_CACHE_SIZE = 128
+TRACK_CACHE_TTL_SEC = 6 * 60 * 60
+track_cache = OrderedDict()  # playable_id -> метаданные, от старых к недавним
+
+
+def ynison_headers(extra_proto=None):
+    ws_proto = {
+        "Ynison-Device-Id": YNISON_DEVICE_ID,
+        "Ynison-Device-Info": json.dumps({"app_name": "Chrome", "type": 1}),
+    }
+    if extra_proto:
+        ws_proto.update(extra_proto)
+    return {
+        "Sec-WebSocket-Protocol": f"Bearer, v2, {json.dumps(ws_proto)}",
+        "Origin": "http://music.yandex.ru",
+        "Authorization": f"OAuth {config.YANDEX_MUSIC_TOKEN}",
+    }
+
+
+def build_ynison_full_state():
+    return {
+        "update_full_state": {
+            "player_state": {
+                "player_queue": {
+                    "current_playable_index": -1,
+                    "entity_id": "",
+                    "entity_type": "VARIOUS",
+                    "playable_list": [],
+                    "options": {"repeat_mode": "NONE"},
+                    "entity_context": "BASED_ON_ENTITY_BY_DEFAULT",
+                    "version": {
+                        "device_id": YNISON_DEVICE_ID,
+                        "version": 9021243204784341000,
+                        "timestamp_ms": 0,
+                    },
+                    "from_optional": "",
+                },
+                "status": {
+                    "duration_ms": 0,
+                    "paused": True,
+                    "playback_speed": 1,
+                    "progress_ms": 0,
+                    "version": {
+                        "device_id": YNISON_DEVICE_ID,
+                        "version": 8321822175199937000,
+                        "timestamp_ms": 0,
+                    },
+                },
+            },
+            "device": {
+                "capabilities": {
+                    "can_be_player": True,
+                    "can_be_remote_controller": False,
+                    "volume_granularity": 16,
+                },
+                "info": {
+                    "device_id": YNISON_DEVICE_ID,
+                    "type": "WEB",
+                    "title": "Chrome Browser",
+                    "app_name": "Chrome",
+                },
+                "volume_info": {"volume": 0},
+                "is_shadow": True,
+            },
+            "is_currently_active": False,
+        },
+        "rid": "ac281c26-a047-4419-ad00-e4fbfda1cba3",
+        "player_action_timestamp_ms": 0,
+        "activity_interception_type": "DO_NOT_INTERCEPT_BY_DEFAULT",
+    }
+
+
+def apply_ynison_state(ynison):
+    """Применяет пришедшее состояние плеера. Возвращает True, если трек или пауза изменились."""
+    player_state = ynison.get("player_state")
+    if not player_state:
+        return False
+    queue = player_state["player_queue"]
+    track_index = queue["current_playable_index"]
+    playable_id = None
+    if 0 <= track_index < len(queue["playable_list"]):
+        playable_id = queue["playable_list"][track_index]["playable_id"]
+    paused = player_state["status"]["paused"]
+
+    if playable_id == ynison_state["playable_id"] and paused == ynison_state["paused"]:
+        return False
+    ynison_state["playable_id"] = playable_id
+    ynison_state["paused"] = paused
+    return True
+
+
+async def ynison_listen():
+    """Одна сессия Ynison: редирект, затем держим открытым сокет состояния и читаем обновления."""
+    session = httpclient.get_http_session()
+    async with session.ws_connect(
+        url=f"{config.YNISON_REDIRECTOR_URL}/redirector.YnisonRedirectService/GetRedirectToYnison",
+        headers=ynison_headers(),
+        timeout=10,
+    ) as ws:
+        recv = await asyncio.wait_for(ws.receive(), timeout=10)
+        data = json.loads(recv.data)
+
+    if "redirect_ticket" not in data or "host" not in data:
+        raise RuntimeError("Ynison redirector returned no ticket")
+
+    scheme = config.YNISON_REDIRECTOR_URL.partition("://")[0]
+    async with session.ws_connect(
+        url=f"{scheme}://{data['host']}/ynison_state.YnisonStateService/PutYnisonState",
+        headers=ynison_headers({"Ynison-Redirect-Ticket": data["redirect_ticket"]}),
+        timeout=10,
+        heartbeat=YNISON_HEARTBEAT_SEC,
+        method="GET",
+    ) as ws:
+        await ws.send_str(json.dumps(build_ynison_full_state()))
+        async for msg in ws:
+            if msg.type != httpclient.aiohttp.WSMsgType.TEXT:
+                break
+            if not ynison_state["connected"]:
+                ynison_state["connected"] = True
+                ynison_state_changed.set()
+            if apply_ynison_state(json.loads(msg.data)):
+                ynison_state_changed.set()
+
+
+async def ynison_state_task():
+    backoff = YNISON_RECONNECT_MIN_SEC
+    while True:
+        try:
+            await ynison_listen()
+            print("Ynison connection closed, reconnecting...")
+        except Exception as e:
+            print(f"Ynison connection error: {e}")
+
+        if ynison_state["connected"]:
+            backoff = YNISON_RECONNECT_MIN_SEC  # Соединение успело поработать — начинаем заново
+        ynison_state["connected"] = False
+        ynison_state["playable_id"] = None
+        ynison_state_changed.set()
+
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, YNISON_RECONNECT_MAX_SEC)
+
+
+async def get_track_metadata(client_ym, playable_id):
+    """Исполнитель/название трека из LRU-кэша или из API."""
+    now = time.time()
+    entry = track_cache.get(playable_id)
+    if entry is not None and now - entry["cached_at"] < TRACK_CACHE_TTL_SEC:
+        track_cache.move_to_end(playable_id)
+        metrics.count("track_cache_hits")
+        return entry
+
+    metrics.count("track_cache_misses")
+    with metrics.timer("ym_tracks_api"):
+        track = (await client_ym.tracks(playable_id))[0]
+    artist = ", ".join([artist["name"] for artist in track["artists"]])
+    title = track["title"]
+    entry = {
+        "cached_at": now,
+        "artist": artist,
+        "title": title,
+    }
+    track_cache[playable_id] = entry
+    track_cache.move_to_end(playable_id)
+    while len(track_cache) > TRACK_CACHE_SIZE:
+        track_cache.popitem(last=False)
+    metrics.gauge("track_cache_size", len(track_cache))
+    return entry
+
+
+def get_track_cache_stats():
+    """Попадания и промахи кэша треков; те же числа отдаются в /metrics."""
+    hits = metrics.counters.get("track_cache_hits", 0)
+    misses = metrics.counters.get("track_cache_misses", 0)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "size": len(track_cache),
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+    }
+
+
+async def get_current_track_ym(client_ym):
+    """Информация о текущем треке по последнему состоянию, присланному Ynison."""
+    if not ynison_state["connected"]:
+        return {"success": False, "paused": False, "track": None}
+    if ynison_state["playable_id"] is None:
+        return {"success": False, "paused": ynison_state["paused"], "track": None}
+    try:
+        with metrics.timer("track_lookup"):
+            track_metadata = await get_track_metadata(client_ym, ynison_state["playable_id"])
+        return {
+            "paused": ynison_state["paused"],
+            "track": track_metadata,
+            "success": True,
+        }
+    except Exception as e:
+        return {"success": False, "error": str(e), "track": None}
+
+
+async def music_status_update_task():
+    if config.YANDEX_MUSIC_TOKEN in MUSIC_TOKEN_PLACEHOLDERS:
+        print("Yandex Music disabled: set the token in the settings to show the current track.")
+        print("Instructions to get the token: https://github.com/MarshalX/yandex-music-api/discussions/513#discussioncomment-2729781")
+        return
+
+    # Клиент создаётся после первого кадра; ошибка инициализации уходит в supervise()
+    await display.wait_for_first_frame()
+    await httpclient.load_aiohttp()
+    yandex_music = await httpclient.import_in_background("yandex_music")
+    ym_client = yandex_music.ClientAsync(config.YANDEX_MUSIC_TOKEN, base_url=config.YANDEX_MUSIC_API_URL)
+    await ym_client.init()
+    print("Yandex Music client initialized")
+
+    ynison_task = asyncio.create_task(ynison_state_task())
+    try:
+        await music_status_loop(ym_client)
+    finally:
+        ynison_task.cancel()
+
+
+async def music_status_loop(ym_client):
+    while True:
+        await ynison_state_changed.wait()  # Прокрутку ведёт Arduino, просыпаемся только при изменении состояния Ynison
+        ynison_state_changed.clear()
+        res = await get_current_track_ym(ym_client)
+        if "error" in res:
+            print(f"Error fetching track info: {res['error']}")
+            asyncio.get_running_loop().call_later(MUSIC_TRACK_RETRY_SEC, ynison_state_changed.set)
+
+        if res["success"] and not res["paused"]:
+            track = res["track"]
+            artist = track["artist"]
+            title = track["title"]
+
+            # Кириллица остаётся как есть: её выводит GlyphManager при кодировании строк для LCD
+            full_text = f"{artist} - {title}"
+
+            if current_track_info["title"] != title or current_track_info["artist"] != artist:
+                cache_stats = get_track_cache_stats()
+                print(f"Now playing: {full_text.strip()} (track cache: {cache_stats['hits']} hits, "
+                      f"{cache_stats['misses']} misses, {cache_stats['hit_rate']:.0%} hit rate)")
+
+            current_track_info["is_playing"] = True
+            current_track_info["is_paused"] = False
+            current_track_info["artist"] = artist
+            current_track_info["title"] = title
+            current_track_info["full_string"] = full_text
+        else:
+            current_track_info["is_playing"] = False
+            current_track_info["is_paused"] = res.get("paused", False)
+            current_track_info["artist"] = ""
+            current_track_info["title"] = ""
+            current_track_info["full_string"] = ""
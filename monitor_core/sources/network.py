@@ -0,0 +1,27 @@
+"""Сеть: SSID и IP в кэше; платформенный backend опрашивается, только когда меняются адреса интерфейсов."""
+
+import asyncio
+
+from .. import config, metrics, platforms
+
+network_info_cache = {"ssid": "No Network", "ip": "No IP"}
+
+
+async def refresh_network_info(signature):
+    """Обновляет кэш. Возвращает False, если backend не ответил и стоит повторить позже."""
+    with metrics.timer("network_probe"):
+        ssid, ip, success = await platforms.current().read_network_info(signature)
+    network_info_cache["ssid"] = ssid
+    network_info_cache["ip"] = ip
+    print(f"Network info updated: SSID='{ssid}', IP='{ip}'")
+    return success
+
+
+async def network_info_update_task():
+    last_signature = None
+    while True:
+        signature = platforms.current().network_signature()
+        if signature != last_signature:
+            if await refresh_network_info(signature):
+                last_signature = signature
+        await asyncio.sleep(config.NETWORK_CHECK_INTERVAL_SEC)
@@ -0,0 +1,70 @@
+"""Системные метрики: фоновые замеры CPU/RAM/диска в кольцевом буфере и в истории (history.py)."""
+
+import asyncio
+import math
+import time
+from collections import deque
+
+import psutil
+
+from .. import config, history, platforms
+
+SYSTEM_STATS_HISTORY_SIZE = 60
+system_stats_samples = deque(maxlen=SYSTEM_STATS_HISTORY_SIZE)  # Кольцевой буфер последних замеров
+HISTORY_CARD_MINUTES = 16  # По столбику графика на минуту, во всю ширину LCD
+
+
+def bytes_to_gb(bytes_value):
+    return round(bytes_value / (1024**3), 1)
+
+
+def sample_system_stats():
+    """Снимает один замер CPU/RAM/диска без ожидания (дельта от прошлого вызова)."""
+    ram = psutil.virtual_memory()
+    disk = psutil.disk_usage(config.DISK_PATH or platforms.current().DEFAULT_DISK_PATH)
+    return {
+        "time": time.time(),
+        "cpu_percent": psutil.cpu_percent(interval=None),
+        "ram_used": ram.used,
+        "ram_total": ram.total,
+        "disk_used": disk.used,
+        "disk_total": disk.total,
+    }
+
+
+def latest_sample():
+    if not system_stats_samples:
+        system_stats_samples.append(sample_system_stats())
+    return system_stats_samples[-1]
+
+
+def get_system_fields():
+    """Поля экрана SYSTEM_STATS из последнего замера."""
+    sample = latest_sample()
+    return {
+        "cpu_percent": sample["cpu_percent"],
+        "ram_used_gb": bytes_to_gb(sample["ram_used"]),
+        "disk_used_gb": bytes_to_gb(sample["disk_used"]),
+        "disk_total_gb": bytes_to_gb(sample["disk_total"]),
+    }
+
+
+def get_history_fields(series):
+    """Поля экранов CPU_HISTORY/RAM_HISTORY в процентах: сводка и средние по минутам за HISTORY_CARD_MINUTES минут."""
+    scale = 100 / latest_sample()["ram_total"] if series == "ram_used" else 1
+    summary = history.summary(series, "1m", HISTORY_CARD_MINUTES)
+    averages = history.averages(series, "1m", HISTORY_CARD_MINUTES)
+    return {
+        "summary": summary and tuple(value * scale for value in summary),
+        "averages": tuple(None if math.isnan(value) else value * scale for value in averages),
+    }
+
+
+async def system_stats_sampler_task():
+    # Первый вызов cpu_percent(interval=None) лишь задаёт точку отсчёта
+    psutil.cpu_percent(interval=None)
+    while True:
+        await asyncio.sleep(config.SYSTEM_STATS_SAMPLE_INTERVAL_SEC)
+        sample = sample_system_stats()
+        system_stats_samples.append(sample)
+        history.record(sample)
@@ -0,0 +1,96 @@
+"""Погода OpenWeatherMap: одна общая загрузка на все запросы, обновление по таймеру."""
+
+import asyncio
+import json
+import time
+
+from .. import config, display, httpclient, metrics
+
+weather_data = {"description": "Unknown", "temperature": 0}
+weather_status = "READY"
+weather_fetch_task = None  # Текущий запрос погоды (повторные запросы присоединяются к нему)
+last_weather_api_update_time = 0
+
+
+async def update_weather_data_func():
+    global weather_status, last_weather_api_update_time
+    aiohttp = await httpclient.load_aiohttp()
+    weather_status = "UPDATING"
+    print("Updating weather data...")
+    url = f"{config.OPENWEATHER_BASE_URL}/data/2.5/weather?id={config.CITY_ID}&appid={config.OPENWEATHER_API_KEY}&units=metric&lang=en"
+    try:
+        session = httpclient.get_http_session()
+        with metrics.timer("weather_api"):
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+
+        temp = round(data['main']['temp'])
+        description_raw = data['weather'][0]['description']
+
+        description_map = {
+            "clear sky": "Ясно",
+            "few clouds": "Мало обл",
+            "scattered clouds": "Облачно",
+            "broken clouds": "Облачно",
+            "overcast clouds": "Пасмурно",
+            "shower rain": "Ливень",
+            "rain": "Дождь",
+            "light rain": "Л Дождь",
+            "moderate rain": "Дождь",
+            "heavy intensity rain": "Сильн до",
+            "thunderstorm": "Гроза",
+            "snow": "Снег",
+            "mist": "Туман",
+            "mists": "Туман",
+            "fog": "Туман",
+            "haze": "Дымка",
+            "sleet": "Мокрый сн",
+            "light shower snow": "Л Снегопад",
+            "heavy shower snow": "Сильн сн",
+            "rain and snow": "Дождь/Сн"
+        }
+
+        description = description_map.get(description_raw.lower(), description_raw)
+
+        weather_data["description"] = description
+        weather_data["temperature"] = temp
+        weather_status = "READY"
+        last_weather_api_update_time = time.time()
+        print(f"Weather updated: {description}, {temp}°C")
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        weather_status = "FAILED"
+        metrics.count("weather_errors")
+        print(f"Error updating weather: {e}")
+        weather_data["description"] = "Ошибка"
+        weather_data["temperature"] = -999
+    except json.JSONDecodeError:
+        weather_status = "FAILED"
+        metrics.count("weather_errors")
+        print("Error decoding weather JSON response.")
+        weather_data["description"] = "JSON Ошибка"
+        weather_data["temperature"] = -999
+    except KeyError as e:
+        weather_status = "FAILED"
+        metrics.count("weather_errors")
+        print(f"Error parsing weather data (missing key): {e}")
+        weather_data["description"] = "Ошибка"
+        weather_data["temperature"] = -999
+
+
+def request_weather_update():
+    """Запускает обновление погоды, если оно ещё не идёт; иначе возвращает текущий запрос."""
+    global weather_fetch_task
+    if weather_fetch_task is None or weather_fetch_task.done():
+        weather_fetch_task = asyncio.create_task(update_weather_data_func())
+    return weather_fetch_task
+
+
+async def weather_update_task():
+    global last_weather_api_update_time
+    await display.wait_for_first_frame()
+    while True:
+        current_time = time.time()
+        if (current_time - last_weather_api_update_time) > (config.WEATHER_UPDATE_INTERVAL_MINUTES * 60) or weather_status == "FAILED":
+            await request_weather_update()
+        await asyncio.sleep(60)
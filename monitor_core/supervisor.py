@@ -0,0 +1,38 @@
+"""Надзор за фоновыми задачами: перезапуск после падения с экспоненциальной задержкой."""
+
+import asyncio
+import time
+
+TASK_RESTART_MIN_SEC = 1
+TASK_RESTART_MAX_SEC = 60
+TASK_FAILED_AFTER_RESTARTS = 5  # Столько падений подряд - задача считается сломанной (перезапуски продолжаются)
+task_health = {}  # имя задачи -> {"state": running/backing-off/failed/stopped, "restarts", "last_error"}
+
+
+async def supervise(name, task_func):
+    """Запускает задачу и перезапускает её после падения с экспоненциальной задержкой."""
+    health = task_health.setdefault(name, {"state": "running", "restarts": 0, "last_error": None})
+    delay = TASK_RESTART_MIN_SEC
+    failures = 0
+    while True:
+        health["state"] = "running"
+        started = time.time()
+        try:
+            await task_func()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            health["last_error"] = f"{type(e).__name__}: {e}"
+        else:
+            health["state"] = "stopped"
+            print(f"Task '{name}' finished")
+            return
+
+        if time.time() - started > TASK_RESTART_MAX_SEC:
+            delay, failures = TASK_RESTART_MIN_SEC, 0  # Задача успела поработать: начинаем отсчёт заново
+        failures += 1
+        health["restarts"] += 1
+        health["state"] = "failed" if failures >= TASK_FAILED_AFTER_RESTARTS else "backing-off"
+        print(f"Task '{name}' {health['state']}: {health['last_error']}; restart #{health['restarts']} in {delay:.0f} s")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, TASK_RESTART_MAX_SEC)
@@ -0,0 +1,56 @@
+"""
+Транслитерация кириллицы в латиницу для вывода на LCD (знакогенератор HD44780 без кириллицы).
+
+Таблица перевода строится один раз при импорте (str.maketrans), чисто ASCII-строки
+возвращаются как есть, а результаты для повторяющихся строк (названия треков, погода)
+запоминаются.
+"""
+
+from functools import lru_cache
+
+# --- Таблицы букв (строчные; заглавные получаются автоматически) ---
+RUSSIAN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+}
+UKRAINIAN = {'є': 'ye', 'і': 'i', 'ї': 'yi', 'ґ': 'g'}  # Только буквы, которых нет в русском
+BELARUSIAN = {'і': 'i', 'ў': 'u'}
+
+TABLES = {"ru": RUSSIAN, "uk": UKRAINIAN, "be": BELARUSIAN}
+DEFAULT_LANGUAGES = ("ru", "uk", "be")
+CACHE_SIZE = 256
+
+
+def build_table(languages=DEFAULT_LANGUAGES):
+    """Таблица для str.translate из таблиц перечисленных языков (позже указанные имеют приоритет)."""
+    mapping = {}
+    for language in languages:
+        for letter, latin in TABLES[language].items():
+            mapping[letter] = latin
+            mapping[letter.upper()] = latin.capitalize()
+    return str.maketrans(mapping)
+
+
+_table = build_table()
+
+
+def set_languages(languages):
+    """Переключает набор таблиц; кэш сбрасывается, так как старые результаты уже неверны."""
+    global _table
+    _table = build_table(languages)
+    _transliterate_cached.cache_clear()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _transliterate_cached(text):
+    return text.translate(_table)
+
+
+def transliterate(text):
+    """Транслитерирует кириллицу в латиницу, остальные символы не меняются."""
+    if text.isascii():
+        return text
+    return _transliterate_cached(text)
@@ -0,0 +1,327 @@
+"""
+Связь с Arduino по последовательному порту: поиск платы, очередь записи, чтение кадров
+и согласование скорости.
+"""
+
+import asyncio
+import io
+import threading
+import time
+
+import serial
+from serial.tools import list_ports
+
+from . import config, metrics, platforms, protocol
+
+# --- Поиск Arduino: по VID/PID USB и приветствию скетча, порт может появиться и пропасть в любой момент ---
+AUTO_PORT_MODES = ("auto", "auto-all")  # "auto" - только порты с ARDUINO_USB_IDS, "auto-all" - все USB-порты
+ARDUINO_USB_IDS = (           # (VID, PID); None - любой PID
+    (0x2341, None),           # Arduino
+    (0x2A03, None),           # Arduino.org
+    (0x1A86, None),           # WCH CH340/CH9102 (клоны)
+    (0x0403, 0x6001),         # FTDI FT232R
+    (0x10C4, 0xEA60),         # Silicon Labs CP210x
+)
+PORT_SCAN_INTERVAL_SEC = 1    # Как часто смотреть список портов, пока Arduino не найден
+HELLO_TIMEOUT_SEC = 3         # Сколько ждать приветствия (загрузчик Arduino после сброса работает ~1.5 с)
+HELLO_RETRY_SEC = 0.5         # Как часто повторять MSG_HELLO_REQUEST, если скетч уже работал
+HELLO_POLL_SEC = 0.02
+REJECTED_RETRY_MIN_SEC = 30   # Порт с VID/PID из ARDUINO_USB_IDS без приветствия опрашивается снова через столько,
+REJECTED_RETRY_MAX_SEC = 600  # каждый раз вдвое позже (скетч могли прошить, пока монитор работал)
+ser = None
+rejected_ports = {}           # порт -> (когда опросить снова, задержка); забываются, когда порт пропадает из системы
+port_errors = {}              # порт -> последняя ошибка открытия (чтобы не повторять её каждую секунду)
+
+# --- Очередь записи в порт: по одной (последней) версии каждого кадра, одна запись на сброс ---
+SERIAL_OUT_MAX_WAITING = 64     # Не пишем, пока в буфере передачи ОС больше стольких байт
+SERIAL_OUT_RETRY_SEC = 0.02
+serial_out_pending = {}         # ключ кадра -> байты; новая версия вытесняет неотправленную старую
+serial_out_ready = asyncio.Event()
+response_started = {}           # ключ кадра в очереди -> время запроса Arduino (для замера задержки ответа)
+frame_decoder = protocol.FrameDecoder()  # Разбор кадров, приходящих от Arduino
+
+# --- Согласование скорости порта ---
+BAUD_REPLY_TIMEOUT_SEC = 1
+BAUD_SWITCH_SETTLE_SEC = 0.05
+BAUD_CONFIRM_TIMEOUT_SEC = 2     # Больше BAUD_CONFIRM_TIMEOUT_MS в скетче: за это время он вернётся на базовую скорость
+ARDUINO_LINK_TIMEOUT_SEC = 5     # Больше CONNECTION_TIMEOUT в скетче
+BAUD_NEGOTIATION_ATTEMPTS = 2
+LINK_CHECK_INTERVAL_SEC = 1      # Как часто проверять, слышно ли Arduino на поднятой скорости
+handshake_waiters = {}           # тип ожидаемого кадра -> Future с его данными
+last_frame_time = 0              # Когда от Arduino пришёл последний кадр
+
+
+# --- Поиск и подключение ---
+def is_arduino_usb_id(port):
+    return any(port.vid == vid and (pid is None or port.pid == pid) for vid, pid in ARDUINO_USB_IDS)
+
+
+def find_arduino_ports():
+    """
+    Порты для опроса, по порядку: (порт, VID/PID из ARDUINO_USB_IDS).
+
+    Опрос открывает порт, а это сбрасывает большинство плат (DTR) и может прервать чужую
+    работу, например печать 3D-принтера. Поэтому в режиме "auto" опрашиваются только порты
+    с VID/PID плат Arduino и USB-UART, а все USB-порты - только в режиме "auto-all".
+    """
+    if config.ARDUINO_PORT not in AUTO_PORT_MODES:
+        return [(config.ARDUINO_PORT, True)]
+    ports = [port for port in list_ports.comports() if port.vid is not None]
+    present = {port.device for port in ports}
+    for device in [device for device in rejected_ports if device not in present]:
+        del rejected_ports[device]
+    if config.ARDUINO_PORT == "auto":
+        ports = [port for port in ports if is_arduino_usb_id(port)]
+    ports.sort(key=lambda port: not is_arduino_usb_id(port))
+    current_time = time.time()
+    return [(port.device, is_arduino_usb_id(port)) for port in ports
+            if rejected_ports.get(port.device, (0, 0))[0] <= current_time]
+
+
+def reject_port(device, known_usb_id):
+    """Порт не поздоровался: порт с VID/PID Arduino опрашивается снова позже, остальные - после переподключения."""
+    if not known_usb_id:
+        rejected_ports[device] = (float("inf"), 0)
+        print(f"Skipping {device}: no hello from the arduino-monitor sketch (reconnect it to probe again)")
+        return
+    previous_delay = rejected_ports.get(device, (0, 0))[1]
+    delay = min(previous_delay * 2, REJECTED_RETRY_MAX_SEC) if previous_delay else REJECTED_RETRY_MIN_SEC
+    rejected_ports[device] = (time.time() + delay, delay)
+    print(f"Skipping {device}: no hello from the arduino-monitor sketch, probing again in {delay} s")
+
+
+async def probe_serial_port(device):
+    """Открывает порт и ждёт MSG_HELLO. Возвращает (порт или None, поздоровался ли скетч)."""
+    try:
+        port = serial.Serial(device, config.BAUD_RATE, timeout=0, exclusive=True)
+    except serial.SerialException as e:
+        if port_errors.get(device) != str(e):
+            port_errors[device] = str(e)
+            print(f"Error: Could not open {device}: {e}")
+            for hint in platforms.current().SERIAL_OPEN_HINTS:
+                print(hint)
+        return None, False
+    port_errors.pop(device, None)
+
+    decoder = protocol.FrameDecoder()
+    deadline = time.time() + HELLO_TIMEOUT_SEC
+    next_request = 0
+    try:
+        while time.time() < deadline:
+            if time.time() >= next_request:
+                port.write(protocol.encode_frame(protocol.MSG_HELLO_REQUEST))
+                next_request = time.time() + HELLO_RETRY_SEC
+            for msg_type, payload in decoder.feed(port.read(port.in_waiting or 1)):
+                if msg_type == protocol.MSG_HELLO and payload == protocol.HELLO_BANNER:
+                    return port, True
+            await asyncio.sleep(HELLO_POLL_SEC)
+    except serial.SerialException:
+        port.close()
+        return None, False
+    return port, False
+
+
+async def attach_arduino():
+    """
+    Ждёт, пока Arduino появится среди портов, и делает его текущим портом (ser).
+    Заданный явно ARDUINO_PORT подключается и без приветствия (скетч без MSG_HELLO).
+    """
+    global ser
+    explicit = config.ARDUINO_PORT not in AUTO_PORT_MODES
+    while True:
+        for device, known_usb_id in find_arduino_ports():
+            port, greeted = await probe_serial_port(device)
+            if port is None:
+                continue
+            if greeted or explicit:
+                print(f"Connected to Arduino on port {device}" + ("" if greeted else " (no hello from the sketch)"))
+                rejected_ports.pop(device, None)
+                ser = port
+                return port
+            port.close()
+            reject_port(device, known_usb_id)
+        await asyncio.sleep(PORT_SCAN_INTERVAL_SEC)
+
+
+def close_serial_port():
+    if ser is not None and ser.is_open:
+        ser.close()
+        print("Connection to Arduino closed.")
+
+
+def reset():
+    """Новое подключение: Arduino перезагружен, всё, что было в очереди, забыто."""
+    global last_frame_time
+    last_frame_time = time.time()
+    frame_decoder.buffer.clear()
+    serial_out_pending.clear()
+    serial_out_ready.clear()
+    response_started.clear()
+
+
+# --- Чтение ---
+def start_reader(loop, on_data, on_error):
+    """
+    Передаёт пришедшие байты в on_data сразу по приходу. Возвращает функцию остановки.
+
+    Дескриптор порта регистрируется в цикле событий (add_reader). В Proactor-цикле Windows
+    add_reader нет (и у порта нет fileno()): там блокирующее чтение живёт в отдельном потоке.
+    """
+    try:
+        fd = ser.fileno()
+
+        def on_serial_readable():
+            try:
+                on_data(ser.read(ser.in_waiting or 1))
+            except Exception as e:
+                loop.remove_reader(fd)
+                on_error(e)
+
+        loop.add_reader(fd, on_serial_readable)
+        return lambda: loop.remove_reader(fd)
+    except (io.UnsupportedOperation, NotImplementedError):
+        pass
+
+    port = ser
+    port.timeout = None  # Поток ниже блокируется на read()
+    stop_reading = threading.Event()
+
+    def deliver(data):
+        try:
+            on_data(data)
+        except Exception as e:
+            on_error(e)
+
+    def serial_reader_thread():
+        try:
+            while not stop_reading.is_set():
+                data = port.read(1)
+                if data:
+                    data += port.read(port.in_waiting)
+                    loop.call_soon_threadsafe(deliver, data)
+        except Exception as e:
+            loop.call_soon_threadsafe(on_error, e)
+
+    threading.Thread(target=serial_reader_thread, daemon=True).start()
+
+    def stop():
+        stop_reading.set()
+        port.cancel_read()
+    return stop
+
+
+# --- Очередь записи в порт ---
+def queue_serial_frame(key, frame):
+    """
+    Ставит кадр в очередь на отправку; неотправленный кадр с тем же ключом заменяется
+    и переносится в конец, чтобы кадры уходили в порядке постановки (символы CGRAM раньше строк).
+    """
+    serial_out_pending.pop(key, None)
+    serial_out_pending[key] = frame
+    serial_out_ready.set()
+
+
+async def serial_writer_loop():
+    while True:
+        await serial_out_ready.wait()
+        # Если Arduino не успевает читать, не копим устаревшие кадры в буфере ОС
+        while ser.out_waiting > SERIAL_OUT_MAX_WAITING:
+            await asyncio.sleep(SERIAL_OUT_RETRY_SEC)
+        serial_out_ready.clear()
+        keys = list(serial_out_pending)
+        buffer = b"".join(serial_out_pending.values())
+        serial_out_pending.clear()
+        with metrics.timer("serial_write"):
+            ser.write(buffer)
+        metrics.count("serial_bytes_out", len(buffer))
+        metrics.count("serial_frames_out", len(keys))
+        log_response_latency(keys, time.time())
+
+
+def log_response_latency(keys, written_time):
+    for key in keys:
+        started = response_started.pop(key, None)
+        if started is not None:
+            metrics.observe("arduino_response", written_time - started)
+            print(f"Response to Arduino written {(written_time - started) * 1000:.1f} ms after the request")
+
+
+# --- Согласование скорости порта ---
+def note_frame_received(current_time):
+    global last_frame_time
+    last_frame_time = current_time
+
+
+def resolve_waiter(msg_type, payload):
+    """Отдаёт кадр тому, кто его ждёт (request_frame). Возвращает True, если кадр был ожидаемым."""
+    waiter = handshake_waiters.get(msg_type)
+    if waiter is None or waiter.done():
+        return False
+    waiter.set_result(payload)
+    return True
+
+
+async def request_frame(frame, reply_type, timeout):
+    """Отправляет кадр и ждёт ответ заданного типа. Возвращает данные ответа или None по таймауту."""
+    waiter = asyncio.get_running_loop().create_future()
+    handshake_waiters[reply_type] = waiter
+    queue_serial_frame("handshake", frame)
+    try:
+        return await asyncio.wait_for(waiter, timeout)
+    except asyncio.TimeoutError:
+        return None
+    finally:
+        handshake_waiters.pop(reply_type, None)
+
+
+async def negotiate_baud_rate():
+    """Поднимает скорость порта до самой высокой, которую Arduino принимает и проходит проверку."""
+    for _ in range(BAUD_NEGOTIATION_ATTEMPTS):
+        device_replied = False
+        for rate in config.NEGOTIATED_BAUD_RATES:
+            reply = await request_frame(protocol.encode_baud(protocol.MSG_BAUD_PROPOSE, rate),
+                                        protocol.MSG_BAUD_ACCEPT, BAUD_REPLY_TIMEOUT_SEC)
+            if reply is None:
+                continue
+            device_replied = True
+            if protocol.decode_baud(reply) != rate:
+                continue  # Arduino не поддерживает эту скорость
+
+            ser.baudrate = rate
+            await asyncio.sleep(BAUD_SWITCH_SETTLE_SEC)
+            echo = await request_frame(protocol.encode_frame(protocol.MSG_BAUD_TEST, protocol.BAUD_TEST_PATTERN),
+                                       protocol.MSG_BAUD_TEST, BAUD_REPLY_TIMEOUT_SEC)
+            if echo == protocol.BAUD_TEST_PATTERN:
+                queue_serial_frame("handshake", protocol.encode_frame(protocol.MSG_BAUD_CONFIRM))
+                print(f"Serial link running at {rate} baud")
+                return rate
+
+            print(f"Baud rate {rate} failed verification, falling back")
+            ser.baudrate = config.BAUD_RATE
+            await asyncio.sleep(BAUD_CONFIRM_TIMEOUT_SEC)
+
+        if device_replied:
+            break
+        # Arduino мог остаться на скорости прошлого запуска: ждём, пока он сбросится по таймауту
+        await asyncio.sleep(ARDUINO_LINK_TIMEOUT_SEC)
+
+    print(f"Baud rate negotiation failed, staying at {config.BAUD_RATE} baud")
+    return config.BAUD_RATE
+
+
+async def link_watchdog():
+    """
+    Следит, что Arduino ещё на согласованной скорости. После сброса платы (кнопка, питание,
+    watchdog) или своего CONNECTION_TIMEOUT скетч возвращается на BASE_BAUD_RATE, и ПК его
+    больше не понимает. Если ARDUINO_LINK_TIMEOUT_SEC от Arduino нет кадров и он не отвечает
+    на MSG_HELLO_REQUEST, исключение уходит в supervise(): порт переоткрывается на базовой
+    скорости и согласование начинается заново.
+    """
+    while True:
+        await asyncio.sleep(LINK_CHECK_INTERVAL_SEC)
+        if ser.baudrate == config.BAUD_RATE or time.time() - last_frame_time < ARDUINO_LINK_TIMEOUT_SEC:
+            continue
+        reply = await request_frame(protocol.encode_frame(protocol.MSG_HELLO_REQUEST),
+                                    protocol.MSG_HELLO, BAUD_REPLY_TIMEOUT_SEC)
+        if reply != protocol.HELLO_BANNER:
+            raise ConnectionError(f"Arduino stopped answering at {ser.baudrate} baud")
@@ -0,0 +1,27 @@
+"""Разбор `netsh wlan show interfaces` на записанном выводе английской и русской Windows."""
+
+import os
+
+import pytest
+
+from monitor_core.platforms import windows
+
+FIXTURES_DIR = os.path.join(os.path.dirname(windows.__file__), "netsh_fixtures")
+FIXTURE_SSIDS = {
+    "connected_en.txt": "HomeNet",
+    "connected_ru.txt": "Дом 5G",
+    "connected_win11_en.txt": "Cafe: Guest",
+    "disconnected_en.txt": "No Network",
+    "disconnected_ru.txt": "No Network",
+}
+
+
+@pytest.mark.parametrize("name, expected", FIXTURE_SSIDS.items())
+def test_parse_netsh_ssid(name, expected):
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        text = f.read().decode(windows.NETSH_ENCODING)
+    assert windows.parse_netsh_ssid(text) == expected
+
+
+def test_every_fixture_has_expected_ssid():
+    assert set(os.listdir(FIXTURES_DIR)) == set(FIXTURE_SSIDS)